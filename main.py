@@ -19,54 +19,145 @@ Options:
 
 import sys
 import os
-import subprocess
 import argparse
+import importlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Project directories, resolved once
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "data"
+OUTPUTS_DIR = BASE_DIR / "outputs"
+SCRIPTS_DIR = BASE_DIR / "scripts"
+# Change-detection sidecars and intermediate caches, not results worth listing
+INTERNAL_FILE_SUFFIXES = ('.hash', '.pkl')
+
+# Visualization steps as (key, script, description, dependencies). A step starts
+# as soon as every step it depends on has finished successfully.
+VIZ_STEPS: List[Tuple[str, str, str, List[str]]] = [
+    ("map", "create_real_map_visualization.py",
+     "Creating interactive winery map", []),
+    ("heatmap", "create_winery_heatmap.py",
+     "Creating basic winery heatmap", []),
+    ("improved_heatmap", "create_winery_heatmap_improved.py",
+     "Creating improved winery heatmap", []),
+    ("recent_data", "download_recent_wineries.py",
+     "Downloading recent wineries data with temporal analysis", []),
+    ("recent_map", "create_recent_wineries_map.py",
+     "Creating recent wineries districts map", ["recent_data"]),
+    ("density", "create_winery_density_map.py",
+     "Creating winery density analysis by district area", []),
+    ("growth", "create_winery_growth_analysis.py",
+     "Creating 10-year winery growth analysis", []),
+    ("correlation", "create_winery_realestate_correlation.py",
+     "Creating winery growth vs real estate correlation analysis", ["growth"]),
+    ("temporal", "create_temporal_leading_indicator_analysis.py",
+     "Creating temporal analysis: winery growth as leading indicator", ["correlation"]),
+]
 
 def run_script(script_path: str, description: str) -> bool:
-    """Run a script and handle errors gracefully."""
+    """Run a script's main() in-process and handle errors gracefully."""
     print(f"\n{'='*60}")
     print(f"Running: {description}")
     print(f"{'='*60}")
     
+    original_dir = os.getcwd()
+    original_argv = sys.argv
     try:
-        # Change to scripts directory to run the script
-        original_dir = os.getcwd()
-        scripts_dir = Path(__file__).parent / "scripts"
-        os.chdir(scripts_dir)
+        # Scripts use paths relative to the scripts directory and import
+        # their shared helpers from it
+        os.chdir(SCRIPTS_DIR)
+        if str(SCRIPTS_DIR) not in sys.path:
+            sys.path.insert(0, str(SCRIPTS_DIR))
         
-        result = subprocess.run([sys.executable, script_path], 
-                              capture_output=False, 
-                              text=True)
+        # Pool workers are only reused on Python < 3.11; drop any matplotlib style
+        # or palette an earlier script set up at import time
+        if 'matplotlib' in sys.modules:
+            sys.modules['matplotlib'].rcdefaults()
         
-        # Change back to original directory
-        os.chdir(original_dir)
+        # Hide our own command line options from the script's argument parser
+        sys.argv = [script_path]
+        module = importlib.import_module(Path(script_path).stem)
+        module.main()
         
-        if result.returncode == 0:
+        print(f"✅ {description} completed successfully!")
+        return True
+    
+    except SystemExit as e:
+        if e.code in (None, 0):
             print(f"✅ {description} completed successfully!")
             return True
-        else:
-            print(f"❌ {description} failed with return code {result.returncode}")
-            return False
-            
+        print(f"❌ {description} failed with exit code {e.code}")
+        return False
+    
     except Exception as e:
         print(f"❌ Error running {description}: {e}")
-        os.chdir(original_dir)  # Ensure we change back even on error
         return False
+    
+    finally:
+        # Change back to original directory even on error
+        sys.argv = original_argv
+        os.chdir(original_dir)
+
+def run_steps_in_parallel(steps: List[Tuple[str, str, str, List[str]]]) -> Dict[str, bool]:
+    """Run independent pipeline steps concurrently, respecting their dependencies."""
+    results: Dict[str, bool] = {}
+    pending = {key: (script, description, deps) for key, script, description, deps in steps}
+    
+    # Give every step a fresh worker process so global state a script sets up at
+    # import (matplotlib style, seaborn palette, ...) cannot leak into the next one
+    pool_options = {'max_tasks_per_child': 1} if sys.version_info >= (3, 11) else {}
+    
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), **pool_options) as executor:
+        running = {}
+        while pending or running:
+            # Start every step whose dependencies have all finished
+            for key in list(pending):
+                script, description, deps = pending[key]
+                if all(dep in results for dep in deps):
+                    del pending[key]
+                    if all(results[dep] for dep in deps):
+                        try:
+                            running[executor.submit(run_script, script, description)] = key
+                        except BrokenProcessPool:
+                            # An earlier worker died and took the pool down with it
+                            print(f"❌ Could not start {description}: the worker pool is broken")
+                            results[key] = False
+                    else:
+                        # Skipped steps are not reported as failures; the failed
+                        # dependency already is
+                        results[key] = True
+            
+            if not running:
+                continue
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    # The worker process itself died (e.g. out of memory or a native
+                    # crash); every step still running on the pool fails the same way
+                    print(f"❌ Step '{key}' crashed: {e!r}")
+                    results[key] = False
+    
+    return results
 
 def check_data_exists() -> bool:
     """Check if the required data files exist."""
-    data_dir = Path(__file__).parent / "data"
-    csv_file = data_dir / "berlin_wineries.csv"
-    json_file = data_dir / "berlin_wineries.json"
+    csv_file = DATA_DIR / "berlin_wineries.csv"
+    json_file = DATA_DIR / "berlin_wineries.json"
+    json_gz_file = DATA_DIR / "berlin_wineries.json.gz"
     
-    return csv_file.exists() and json_file.exists()
+    return csv_file.exists() and (json_file.exists() or json_gz_file.exists())
 
 def create_directories():
     """Create necessary directories if they don't exist."""
-    base_dir = Path(__file__).parent
     for dir_name in ["data", "outputs", "scripts"]:
-        dir_path = base_dir / dir_name
+        dir_path = BASE_DIR / dir_name
         dir_path.mkdir(exist_ok=True)
         print(f"📁 Directory '{dir_name}' ready")
 
@@ -115,47 +206,17 @@ def main():
         
         print("\n📊 Phase 2: Creating Visualizations")
         
-        # Step 2: Create interactive map
-        map_success = run_script("create_real_map_visualization.py", 
-                                "Creating interactive winery map")
-        
-        # Step 3: Create basic heatmap
-        heatmap_success = run_script("create_winery_heatmap.py", 
-                                   "Creating basic winery heatmap")
-        
-        # Step 4: Create improved heatmap
-        improved_heatmap_success = run_script("create_winery_heatmap_improved.py", 
-                                            "Creating improved winery heatmap")
-        
-        # Step 5: Download recent wineries data (with temporal analysis)
-        recent_data_success = run_script("download_recent_wineries.py",
-                                        "Downloading recent wineries data with temporal analysis")
-        
-        # Step 6: Create recent wineries map
-        recent_map_success = True
-        if recent_data_success:
-            recent_map_success = run_script("create_recent_wineries_map.py",
-                                           "Creating recent wineries districts map")
-        
-        # Step 7: Create winery density analysis
-        density_success = run_script("create_winery_density_map.py",
-                                    "Creating winery density analysis by district area")
-        
-        # Step 8: Create winery growth analysis
-        growth_success = run_script("create_winery_growth_analysis.py",
-                                   "Creating 10-year winery growth analysis")
-        
-        # Step 9: Create winery-real estate correlation analysis
-        correlation_success = True
-        if growth_success:
-            correlation_success = run_script("create_winery_realestate_correlation.py",
-                                            "Creating winery growth vs real estate correlation analysis")
-        
-        # Step 10: Create temporal leading indicator analysis
-        temporal_success = True
-        if correlation_success:
-            temporal_success = run_script("create_temporal_leading_indicator_analysis.py",
-                                         "Creating temporal analysis: winery growth as leading indicator")
+        # Steps 2-10: Create visualizations and analyses, in parallel where possible
+        results = run_steps_in_parallel(VIZ_STEPS)
+        map_success = results["map"]
+        heatmap_success = results["heatmap"]
+        improved_heatmap_success = results["improved_heatmap"]
+        recent_data_success = results["recent_data"]
+        recent_map_success = results["recent_map"]
+        density_success = results["density"]
+        growth_success = results["growth"]
+        correlation_success = results["correlation"]
+        temporal_success = results["temporal"]
         
         # Summary
         print("\n" + "="*60)
@@ -177,18 +238,19 @@ def main():
         
         # Show output files
         print("\n📁 Generated Files:")
-        outputs_dir = Path(__file__).parent / "outputs"
-        if outputs_dir.exists():
-            for file in outputs_dir.iterdir():
-                if file.is_file():
-                    print(f"   📄 {file.name}")
+        if OUTPUTS_DIR.exists():
+            # scandir entries know their type from the directory listing, no stat per file
+            with os.scandir(OUTPUTS_DIR) as entries:
+                for entry in entries:
+                    if entry.is_file() and not entry.name.endswith(INTERNAL_FILE_SUFFIXES):
+                        print(f"   📄 {entry.name}")
         
-        data_dir = Path(__file__).parent / "data" 
-        if data_dir.exists():
+        if DATA_DIR.exists():
             print("\n📁 Data Files:")
-            for file in data_dir.iterdir():
-                if file.is_file():
-                    print(f"   📄 {file.name}")
+            with os.scandir(DATA_DIR) as entries:
+                for entry in entries:
+                    if entry.is_file() and not entry.name.endswith(INTERNAL_FILE_SUFFIXES):
+                        print(f"   📄 {entry.name}")
         
         # Check overall success
         all_viz_success = (map_success and heatmap_success and improved_heatmap_success and 
@@ -3,49 +3,106 @@
 Create an interactive map of Berlin wineries using real map tiles
 """
 
+import gzip
+import hashlib
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import numpy as np
 import folium
-from folium.plugins import HeatMap
+from folium.plugins import HeatMap, FastMarkerCluster
 import json
 
-def create_real_berlin_wineries_map():
-    """Create an interactive map of Berlin wineries on a real map."""
-    
-    # Load the winery data
+WINERY_CSV = '../data/berlin_wineries.csv'
+MAP_OUTPUT_FILE = '../outputs/berlin_wineries_real_map.html'
+# Populated by download_map_tiles.py; tile URLs are relative to the saved map
+LOCAL_TILES_DIR = '../outputs/tiles'
+
+# Columns the map and density analysis actually use, with explicit dtypes so
+# pandas skips parsing unused metadata and type inference
+WINERY_COLUMN_DTYPES = {
+    'name': str,
+    'type': str,
+    'shop': str,
+    'street': str,
+    'housenumber': str,
+    'postcode': str,
+    'phone': str,
+    'website': str,
+    'opening_hours': str,
+    'latitude': 'float64',
+    'longitude': 'float64',
+}
+
+# Marker (color, icon) per shop category, matched case-insensitively as a
+# substring of the shop tag; anything else gets the default style
+SHOP_MARKER_STYLES = {
+    'wine': ('red', 'wine-glass'),
+}
+DEFAULT_MARKER_STYLE = ('purple', 'shopping-cart')
+SHOP_CATEGORY_PATTERN = re.compile('(' + '|'.join(map(re.escape, SHOP_MARKER_STYLES)) + ')', re.IGNORECASE)
+
+def load_winery_data():
+    """Load the winery data once, dropping rows with missing coordinates."""
     print("Loading winery data...")
-    df = pd.read_csv('../data/berlin_wineries.csv')
+    df = pd.read_csv(WINERY_CSV,
+                     usecols=list(WINERY_COLUMN_DTYPES),
+                     dtype=WINERY_COLUMN_DTYPES)
     
     # Remove rows with missing coordinates
-    df_clean = df.dropna(subset=['latitude', 'longitude'])
+    return df.dropna(subset=['latitude', 'longitude'])
+
+def create_real_berlin_wineries_map(df_clean):
+    """Create an interactive map of Berlin wineries on a real map."""
+    
     print(f"Found {len(df_clean)} wineries with valid coordinates")
     
     # Berlin boundaries
     lat_min, lat_max = 52.3387, 52.6755
     lon_min, lon_max = 13.0883, 13.7611
     
-    # Filter data to Berlin area
-    df_berlin = df_clean[
-        (df_clean['latitude'] >= lat_min) & (df_clean['latitude'] <= lat_max) &
-        (df_clean['longitude'] >= lon_min) & (df_clean['longitude'] <= lon_max)
-    ]
+    # Filter data to Berlin area with a single mask over the raw coordinate arrays
+    lat = df_clean['latitude'].to_numpy()
+    lon = df_clean['longitude'].to_numpy()
+    in_berlin = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+    df_berlin = df_clean.iloc[in_berlin]
     
     print(f"Filtered to {len(df_berlin)} wineries within Berlin boundaries")
     
     # Create a Folium map centered on Berlin
     berlin_center = [52.520008, 13.404954]  # Berlin center coordinates
-    m = folium.Map(
-        location=berlin_center,
-        zoom_start=11,
-        tiles='OpenStreetMap'
-    )
+    if os.path.isdir(LOCAL_TILES_DIR):
+        # Serve OSM tiles from the local cache, upscaling beyond the cached zoom levels
+        m = folium.Map(location=berlin_center, zoom_start=11, tiles=None)
+        folium.TileLayer(
+            tiles='tiles/{z}/{x}/{y}.png',
+            name='OpenStreetMap (local)',
+            attr='© OpenStreetMap contributors',
+            min_zoom=10,
+            max_native_zoom=14
+        ).add_to(m)
+    else:
+        m = folium.Map(
+            location=berlin_center,
+            zoom_start=11,
+            tiles='OpenStreetMap'
+        )
     
     # Add different tile layers for user choice
     folium.TileLayer('cartodbpositron', name='CartoDB Positron', attr='© CartoDB').add_to(m)
     folium.TileLayer('cartodbdark_matter', name='CartoDB Dark', attr='© CartoDB').add_to(m)
     folium.TileLayer('stamenterrain', name='Terrain', attr='© Stamen Design').add_to(m)
     
-    # Prepare data for heatmap
-    heat_data = [[row['latitude'], row['longitude']] for idx, row in df_berlin.iterrows()]
+    # Prepare data for heatmap, collapsing duplicate coordinates into weighted points
+    heat_data = (
+        df_berlin.groupby(['latitude', 'longitude'], sort=False)
+        .size()
+        .reset_index()
+        .to_numpy()
+        .tolist()
+    )
     
     # Add heatmap layer
     HeatMap(
@@ -64,37 +121,58 @@ def create_real_berlin_wineries_map():
         }
     ).add_to(m)
     
-    # Add individual winery markers with clustering for better performance
-    from folium.plugins import MarkerCluster
-    marker_cluster = MarkerCluster().add_to(m)
-    
-    # Add markers for each winery
-    for idx, row in df_berlin.iterrows():
-        # Create popup text with winery information
-        popup_text = f"""
-        <b>{row['name']}</b><br>
-        Type: {row.get('type', 'N/A')}<br>
-        Address: {row.get('street', 'N/A')} {row.get('housenumber', '')}<br>
-        Postcode: {row.get('postcode', 'N/A')}<br>
-        Phone: {row.get('phone', 'N/A')}<br>
-        Website: {row.get('website', 'N/A')}<br>
-        Hours: {row.get('opening_hours', 'N/A')}
-        """
-        
-        # Determine marker color based on type or amenity
-        if 'wine' in str(row.get('shop', '')).lower():
-            icon_color = 'red'
-            icon = 'wine-glass'
-        else:
-            icon_color = 'purple'
-            icon = 'shopping-cart'
-        
-        folium.Marker(
-            location=[row['latitude'], row['longitude']],
-            popup=folium.Popup(popup_text, max_width=300),
-            tooltip=row['name'],
-            icon=folium.Icon(color=icon_color, icon=icon, prefix='fa')
-        ).add_to(marker_cluster)
+    # Build every popup in one vectorized string concatenation
+    def popup_field(column, default='N/A'):
+        return df_berlin[column].fillna(default).astype(str)
+    
+    popup_texts = (
+        "\n        <b>" + df_berlin['name'].astype(str) + "</b><br>\n"
+        "        Type: " + popup_field('type') + "<br>\n"
+        "        Address: " + popup_field('street') + " " + popup_field('housenumber', '') + "<br>\n"
+        "        Postcode: " + popup_field('postcode') + "<br>\n"
+        "        Phone: " + popup_field('phone') + "<br>\n"
+        "        Website: " + popup_field('website') + "<br>\n"
+        "        Hours: " + popup_field('opening_hours') + "\n        "
+    )
+    
+    # Determine marker color based on type or amenity
+    shop_category = df_berlin['shop'].str.extract(SHOP_CATEGORY_PATTERN, expand=False).str.lower()
+    
+    # Collapse wineries sharing exact coordinates into one marker listing all of them
+    markers = pd.DataFrame({
+        'latitude': df_berlin['latitude'],
+        'longitude': df_berlin['longitude'],
+        'name': df_berlin['name'],
+        'popup': popup_texts,
+        'icon_color': shop_category.map({c: style[0] for c, style in SHOP_MARKER_STYLES.items()})
+                                   .fillna(DEFAULT_MARKER_STYLE[0]),
+        'icon': shop_category.map({c: style[1] for c, style in SHOP_MARKER_STYLES.items()})
+                             .fillna(DEFAULT_MARKER_STYLE[1]),
+    }).groupby(['latitude', 'longitude'], sort=False, as_index=False).agg(
+        name=('name', 'first'),
+        popup=('popup', '<hr>'.join),
+        icon_color=('icon_color', 'first'),
+        icon=('icon', 'first'),
+    )
+    
+    # Add winery markers as one clustered layer; the browser builds each marker
+    # from its data row instead of folium rendering one object per winery
+    marker_callback = """
+    function (row) {
+        var icon = L.AwesomeMarkers.icon({
+            icon: row[5], markerColor: row[4], iconColor: 'white', prefix: 'fa'
+        });
+        var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+        marker.bindPopup(row[2], {maxWidth: 300});
+        marker.bindTooltip(row[3]);
+        return marker;
+    };
+    """
+    FastMarkerCluster(
+        markers[['latitude', 'longitude', 'popup', 'name', 'icon_color', 'icon']].values.tolist(),
+        callback=marker_callback,
+        name='Wineries'
+    ).add_to(m)
     
     # Add Berlin landmarks for reference
     landmarks = {
@@ -136,10 +214,15 @@ def create_real_berlin_wineries_map():
     m.get_root().html.add_child(folium.Element(legend_html))
     
     # Save the map
-    output_file = '../outputs/berlin_wineries_real_map.html'
+    output_file = MAP_OUTPUT_FILE
     m.save(output_file)
     print(f"Interactive map saved as {output_file}")
     
+    # Write a pre-compressed copy for servers that can serve .gz sidecars directly
+    with open(output_file, 'rb') as f_in, gzip.open(output_file + '.gz', 'wb', compresslevel=6) as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    print(f"Compressed map saved as {output_file}.gz")
+    
     # Also create a static version using folium's screenshot capability
     try:
         # This requires selenium and a webdriver, but let's try
@@ -153,12 +236,37 @@ def create_real_berlin_wineries_map():
     
     return m, output_file
 
-def create_density_analysis():
-    """Create additional analysis of winery density by district."""
+def compute_map_cache_key():
+    """Hash the winery CSV together with this script, so editing either forces a rebuild."""
+    digest = hashlib.blake2b()
+    digest.update(b'local-tiles' if os.path.isdir(LOCAL_TILES_DIR) else b'remote-tiles')
+    for path in (WINERY_CSV, __file__):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def map_is_up_to_date(cache_key):
+    """Check whether the saved map was built from inputs matching cache_key."""
+    hash_file = MAP_OUTPUT_FILE + '.hash'
+    if not (os.path.exists(MAP_OUTPUT_FILE) and os.path.exists(hash_file)):
+        return False
+    with open(hash_file) as f:
+        return f.read().strip() == cache_key
+
+def build_map_if_stale(df_clean):
+    """Create the interactive map unless the saved one was built from identical inputs."""
+    cache_key = compute_map_cache_key()
+    if map_is_up_to_date(cache_key):
+        print(f"Interactive map {MAP_OUTPUT_FILE} is up to date, skipping rebuild")
+        return MAP_OUTPUT_FILE
     
-    # Load the data
-    df = pd.read_csv('../data/berlin_wineries.csv')
-    df_clean = df.dropna(subset=['latitude', 'longitude'])
+    _, output_file = create_real_berlin_wineries_map(df_clean)
+    with open(output_file + '.hash', 'w') as f:
+        f.write(cache_key)
+    return output_file
+
+def create_density_analysis(df_clean):
+    """Create additional analysis of winery density by district."""
     
     # Berlin district approximations (this is simplified - in reality you'd use proper GIS data)
     districts = {
@@ -171,17 +279,19 @@ def create_density_analysis():
         'Schöneberg': {'lat_range': (52.48, 52.50), 'lon_range': (13.35, 13.38)},
     }
     
-    district_counts = {}
-    for district, bounds in districts.items():
-        lat_min, lat_max = bounds['lat_range']
-        lon_min, lon_max = bounds['lon_range']
-        
-        count = len(df_clean[
-            (df_clean['latitude'] >= lat_min) & (df_clean['latitude'] <= lat_max) &
-            (df_clean['longitude'] >= lon_min) & (df_clean['longitude'] <= lon_max)
-        ])
-        
-        district_counts[district] = count
+    lat = df_clean['latitude'].to_numpy()
+    lon = df_clean['longitude'].to_numpy()
+    
+    # Lay the district rectangles out as contiguous bound arrays and test every
+    # winery against every district in one broadcast expression
+    lat_min, lat_max, lon_min, lon_max = np.array([
+        [*bounds['lat_range'], *bounds['lon_range']] for bounds in districts.values()
+    ]).T
+    inside = (
+        (lat[:, None] >= lat_min) & (lat[:, None] <= lat_max) &
+        (lon[:, None] >= lon_min) & (lon[:, None] <= lon_max)
+    )
+    district_counts = dict(zip(districts, inside.sum(axis=0).tolist()))
     
     print("\nWinery density by district (approximate):")
     for district, count in sorted(district_counts.items(), key=lambda x: x[1], reverse=True):
@@ -189,15 +299,25 @@ def create_density_analysis():
     
     return district_counts
 
-if __name__ == "__main__":
+def main():
+    """Main function to create the interactive map and district analysis."""
     print("Creating real map visualization of Berlin wineries...")
     
-    # Create the interactive map
-    map_obj, output_file = create_real_berlin_wineries_map()
+    # Load the data once and share it between the map and the analysis
+    df_clean = load_winery_data()
     
-    # Create density analysis
-    district_analysis = create_density_analysis()
+    # Build the map in a worker process while the density analysis runs here
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        map_future = executor.submit(build_map_if_stale, df_clean)
+        
+        # Create density analysis
+        district_analysis = create_density_analysis(df_clean)
+        
+        output_file = map_future.result()
     
     print(f"\nVisualization complete!")
     print(f"Open {output_file} in your web browser to view the interactive map.")
-    print(f"Total unique winery locations plotted: {len(pd.read_csv('../data/berlin_wineries.csv').dropna(subset=['latitude', 'longitude']))}")
\ No newline at end of file
+    print(f"Total unique winery locations plotted: {len(df_clean)}")
+
+if __name__ == "__main__":
+    main()
@@ -3,142 +3,180 @@
 Create recent wineries analysis from existing data using heuristics to identify recently opened wineries
 """
 
+import os
 import pandas as pd
-import json
-from datetime import datetime, timedelta
 import random
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from overpass_utils import iter_records, write_json
+
+# Types of the columns the recency heuristics read; postcodes stay strings.
+# The remaining columns are loaded with their inferred types and carried through
+# to the saved dataset unchanged
+EXISTING_WINERY_DTYPES = {
+    'name': str,
+    'postcode': str,
+    'shop': str,
+    'opening_hours': str,
+    'website': str,
+    'email': str,
+    'latitude': 'float64',
+    'longitude': 'float64',
+}
 
 def load_existing_data():
     """Load existing winery data."""
     try:
-        df = pd.read_csv('../data/berlin_wineries.csv')
+        df = pd.read_csv('../data/berlin_wineries.csv', dtype=EXISTING_WINERY_DTYPES)
         print(f"Loaded {len(df)} existing wineries")
         return df
     except FileNotFoundError:
         print("Existing winery data not found. Please run the main analysis first.")
         return None
 
-def add_temporal_analysis(df):
-    """Add temporal analysis based on heuristics and data patterns."""
+# Districts in the order their bounding boxes are checked
+DISTRICT_NAMES = [
+    'Mitte', 'Prenzlauer Berg', 'Charlottenburg', 'Kreuzberg', 'Neukölln',
+    'Friedrichshain', 'Schöneberg', 'Wedding', 'Tempelhof', 'Steglitz',
+]
+
+# Approximate district bounding boxes, one entry per district in DISTRICT_NAMES
+DISTRICT_LAT_MIN = np.array([52.50, 52.52, 52.49, 52.49, 52.45, 52.50, 52.46, 52.53, 52.45, 52.44])
+DISTRICT_LAT_MAX = np.array([52.55, 52.56, 52.53, 52.52, 52.50, 52.53, 52.50, 52.57, 52.49, 52.48])
+DISTRICT_LON_MIN = np.array([13.35, 13.40, 13.28, 13.38, 13.40, 13.42, 13.33, 13.33, 13.38, 13.31])
+DISTRICT_LON_MAX = np.array([13.42, 13.45, 13.35, 13.42, 13.47, 13.48, 13.38, 13.38, 13.42, 13.36])
+
+def assign_districts(lat, lon):
+    """Assign a district to every coordinate pair based on approximate bounding boxes."""
+    lat = np.asarray(lat)[:, None]
+    lon = np.asarray(lon)[:, None]
+    
+    # (wineries x districts) matrix of bounding box hits
+    in_box = ((lat >= DISTRICT_LAT_MIN) & (lat <= DISTRICT_LAT_MAX) &
+              (lon >= DISTRICT_LON_MIN) & (lon <= DISTRICT_LON_MAX))
+    
+    # Earlier boxes take precedence where they overlap; wineries outside all boxes are 'Other'
+    district_index = np.where(in_box.any(axis=1), in_box.argmax(axis=1), len(DISTRICT_NAMES))
+    return np.array(DISTRICT_NAMES + ['Other'])[district_index]
+
+# Rows per worker below which add_temporal_analysis_parallel stays in-process
+PARALLEL_MIN_CHUNK_ROWS = 50_000
+
+# Postcodes of areas with more development activity (gentrification)
+TRENDY_POSTCODES = frozenset({'10117', '10119', '10437', '10999', '12047'})
+EMERGING_POSTCODES = frozenset({'10243', '10245', '10997'})
+
+# Points added by each heuristic flag column built in add_temporal_analysis
+HEURISTIC_WEIGHTS = np.array([3, 1, 2, 3, 1, 1, 2], dtype=np.int8)
+
+# Recency categories and the score each one starts at
+RECENCY_CATEGORIES = np.array(['established', 'possibly_recent', 'likely_recent', 'recent', 'very_recent'])
+RECENCY_THRESHOLDS = np.array([1, 3, 5, 7])
+
+def score_recency(heuristic_flags, noise):
+    """
+    Score wineries from their heuristic flags in one pass.
+    Returns the recency scores and the index of each score's category in RECENCY_CATEGORIES.
+    """
+    recency_score = heuristic_flags @ HEURISTIC_WEIGHTS + noise
+    category_codes = np.searchsorted(RECENCY_THRESHOLDS, recency_score, side='right')
+    return recency_score, category_codes
+
+def add_temporal_analysis(df, rng):
+    """
+    Add temporal analysis based on heuristics and data patterns, drawing randomness from rng.
+    The new columns are added to df in place, which is also returned.
+    """
     
-    # Set random seed for reproducible results
-    np.random.seed(42)
+    now = pd.Timestamp.now()
     
-    current_date = datetime.now()
-    two_years_ago = current_date - timedelta(days=730)
-    one_year_ago = current_date - timedelta(days=365)
+    # Draw all random values up front, one batch per distribution
+    noise = rng.normal(0, 1.5, len(df))
+    days_recent = rng.integers(0, 365, len(df))
+    days_older = rng.integers(365, 730, len(df))
     
-    # Create enhanced dataset
-    enhanced_data = []
+    # Initialize temporal fields
+    df['start_date'] = ''
+    df['opening_date'] = ''
+    df['osm_timestamp'] = ''
+    df['osm_version'] = np.int16(1)
+    df['osm_changeset'] = ''
+    df['created_date'] = ''
     
-    for idx, row in df.iterrows():
-        winery = row.to_dict()
-        
-        # Initialize temporal fields
-        winery['start_date'] = ''
-        winery['opening_date'] = ''
-        winery['osm_timestamp'] = ''
-        winery['osm_version'] = 1
-        winery['osm_changeset'] = ''
-        winery['created_date'] = ''
-        
-        # Assign recency based on heuristics
-        recency_score = 0
-        recency_category = "established"
-        
+    # Assign recency based on heuristics, encoded as one 0/1 flag column per heuristic
+    # Case-insensitive matching on the raw names, without building a lowercased copy
+    is_jacques = df['name'].str.contains('jacques', case=False, regex=False, na=False)
+    heuristic_flags = np.column_stack([
         # Heuristic 1: Newer chains/franchises are likely more recent
-        name = str(winery.get('name', '')).lower()
-        if any(chain in name for chain in ['jacques', 'depot', 'wine', 'weinladen']):
-            if 'jacques' in name:
-                recency_score += 3  # Jacques is a newer chain
-            else:
-                recency_score += 1
-        
+        is_jacques,  # Jacques is a newer chain
+        df['name'].str.contains('depot|wine|weinladen', case=False, na=False) & ~is_jacques,
         # Heuristic 2: Areas with more development activity (gentrification)
-        postcode = str(winery.get('postcode', ''))
-        if postcode in ['10117', '10119', '10437', '10999', '12047']:  # Trendy areas
-            recency_score += 2
-        elif postcode in ['10243', '10245', '10997']:  # Emerging areas
-            recency_score += 3
-        
+        df['postcode'].isin(TRENDY_POSTCODES),
+        df['postcode'].isin(EMERGING_POSTCODES),
         # Heuristic 3: Business types more likely to be recent
-        if winery.get('shop') == 'wine':
-            recency_score += 1  # Wine shops are growing
-        
+        df['shop'] == 'wine',  # Wine shops are growing
         # Heuristic 4: Areas with opening hours that suggest modern business
-        opening_hours = str(winery.get('opening_hours', ''))
-        if 'Mo-Fr' in opening_hours or 'Mo-Sa' in opening_hours:
-            recency_score += 1
-        
+        df['opening_hours'].astype(str).str.contains('Mo-Fr|Mo-Sa'),
         # Heuristic 5: Has website/email (modern business practice)
-        if winery.get('website') or winery.get('email'):
-            recency_score += 2
-        
-        # Add some randomness to simulate real temporal distribution
-        random_factor = np.random.normal(0, 1.5)
-        recency_score += random_factor
-        
-        # Convert score to categories
-        if recency_score >= 7:
-            recency_category = "very_recent"
-            # Simulate recent opening date
-            days_ago = np.random.randint(0, 365)
-            opening_date = current_date - timedelta(days=days_ago)
-            winery['start_date'] = opening_date.strftime('%Y-%m-%d')
-        elif recency_score >= 5:
-            recency_category = "recent"
-            days_ago = np.random.randint(365, 730)
-            opening_date = current_date - timedelta(days=days_ago)
-            winery['start_date'] = opening_date.strftime('%Y-%m-%d')
-        elif recency_score >= 3:
-            recency_category = "likely_recent"
-        elif recency_score >= 1:
-            recency_category = "possibly_recent"
-        else:
-            recency_category = "established"
-        
-        # Add temporal metadata
-        winery['recency_score'] = round(recency_score, 2)
-        winery['recency_category'] = recency_category
-        winery['is_recent'] = recency_score >= 5
-        
-        # Add district based on location patterns
-        lat = winery.get('latitude', 0)
-        lon = winery.get('longitude', 0)
-        
-        # District assignment based on coordinates
-        if 52.50 <= lat <= 52.55 and 13.35 <= lon <= 13.42:
-            district = 'Mitte'
-        elif 52.52 <= lat <= 52.56 and 13.40 <= lon <= 13.45:
-            district = 'Prenzlauer Berg'
-        elif 52.49 <= lat <= 52.53 and 13.28 <= lon <= 13.35:
-            district = 'Charlottenburg'
-        elif 52.49 <= lat <= 52.52 and 13.38 <= lon <= 13.42:
-            district = 'Kreuzberg'
-        elif 52.45 <= lat <= 52.50 and 13.40 <= lon <= 13.47:
-            district = 'Neukölln'
-        elif 52.50 <= lat <= 52.53 and 13.42 <= lon <= 13.48:
-            district = 'Friedrichshain'
-        elif 52.46 <= lat <= 52.50 and 13.33 <= lon <= 13.38:
-            district = 'Schöneberg'
-        elif 52.53 <= lat <= 52.57 and 13.33 <= lon <= 13.38:
-            district = 'Wedding'
-        elif 52.45 <= lat <= 52.49 and 13.38 <= lon <= 13.42:
-            district = 'Tempelhof'
-        elif 52.44 <= lat <= 52.48 and 13.31 <= lon <= 13.36:
-            district = 'Steglitz'
-        else:
-            district = 'Other'
-        
-        winery['district'] = district
-        
-        enhanced_data.append(winery)
+        df['website'].notna() | df['email'].notna(),
+    ]).astype(np.int8)
+    
+    # Add some randomness to simulate real temporal distribution
+    recency_score, category_codes = score_recency(heuristic_flags, noise)
+    recency_category = RECENCY_CATEGORIES[category_codes]
+    
+    # Simulate opening dates for recent wineries: within the last year for
+    # very recent ones, one to two years ago for recent ones
+    has_opening_date = recency_score >= 5
+    days_ago = np.where(recency_score >= 7, days_recent, days_older)
+    opening_dates = now - pd.to_timedelta(days_ago[has_opening_date], unit='D')
+    df.loc[has_opening_date, 'start_date'] = opening_dates.strftime('%Y-%m-%d')
+    
+    # Add temporal metadata
+    df['recency_score'] = recency_score.round(2).astype(np.float32)
+    df['recency_category'] = recency_category
+    df['is_recent'] = (recency_score >= 5).astype(bool)
+    
+    # Add district based on location patterns
+    df['district'] = assign_districts(df['latitude'].to_numpy(), df['longitude'].to_numpy())
     
-    return pd.DataFrame(enhanced_data)
+    # Store the low-cardinality string columns as categoricals; the categories are
+    # fixed up front so later assignments of known values keep working
+    df['district'] = pd.Categorical(df['district'], categories=DISTRICT_NAMES + ['Other'])
+    df['recency_category'] = pd.Categorical(df['recency_category'], categories=RECENCY_CATEGORIES)
+    df['postcode'] = df['postcode'].astype('category')
+    
+    return df
+
+def _add_temporal_analysis_chunk(chunk, seed):
+    """Worker entry point: analyze one chunk of rows with its own generator."""
+    return add_temporal_analysis(chunk, np.random.default_rng(seed))
+
+def add_temporal_analysis_parallel(df, rng, min_chunk_rows=PARALLEL_MIN_CHUNK_ROWS):
+    """
+    Run add_temporal_analysis over row chunks in worker processes.
+    Every row is scored independently, so chunks need no coordination; each one
+    gets its own seed drawn from rng. Frames too small to fill two chunks of
+    min_chunk_rows are analyzed in this process with rng directly.
+    The chunking depends only on the frame size, never on the CPU count, so a
+    given seed produces the same scores on every machine.
+    """
+    n_chunks = len(df) // min_chunk_rows
+    if n_chunks < 2:
+        return add_temporal_analysis(df, rng)
+    
+    chunks = [df.iloc[rows] for rows in np.array_split(np.arange(len(df)), n_chunks)]
+    seeds = rng.integers(0, 2**32, n_chunks)
+    with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, n_chunks)) as executor:
+        enhanced_df = pd.concat(executor.map(_add_temporal_analysis_chunk, chunks, seeds))
+    
+    # Each chunk built its own postcode categories; unify them after the concat
+    enhanced_df['postcode'] = enhanced_df['postcode'].astype('category')
+    return enhanced_df
 
-def boost_specific_districts(df):
-    """Apply specific boosts to make certain districts appear more active."""
+def boost_specific_districts(df, rng):
+    """Apply specific boosts to make certain districts appear more active, drawing randomness from rng."""
     
     # Districts we want to highlight as emerging
     emerging_districts = {
@@ -148,24 +186,32 @@ def boost_specific_districts(df):
         'Kreuzberg': 3      # Cultural hub
     }
     
+    now = pd.Timestamp.now()
+    
+    # Draw a boosted score and opening date offset for every winery up front;
+    # only the rows picked for boosting use theirs
+    boost_scores = rng.uniform(5, 8, len(df)).astype(np.float32)
+    boost_days_ago = rng.integers(365, 730, len(df))
+    
     for district, boost in emerging_districts.items():
         district_mask = df['district'] == district
         # Randomly boost some wineries in these districts
-        eligible_indices = df[district_mask & (df['recency_score'] < 5)].index
+        eligible_positions = np.flatnonzero(district_mask & (df['recency_score'] < 5))
         
-        if len(eligible_indices) > 0:
+        if len(eligible_positions) > 0:
             # Boost a portion of wineries in this district
-            boost_count = min(boost, len(eligible_indices))
-            boost_indices = np.random.choice(eligible_indices, boost_count, replace=False)
+            boost_count = min(boost, len(eligible_positions))
+            boost_positions = rng.choice(eligible_positions, boost_count, replace=False)
+            boost_indices = df.index[boost_positions]
             
-            for idx in boost_indices:
-                df.loc[idx, 'recency_score'] = np.random.uniform(5, 8)
-                df.loc[idx, 'recency_category'] = 'likely_recent'
-                df.loc[idx, 'is_recent'] = True
-                # Add simulated opening date
-                days_ago = np.random.randint(365, 730)
-                opening_date = datetime.now() - timedelta(days=days_ago)
-                df.loc[idx, 'start_date'] = opening_date.strftime('%Y-%m-%d')
+            # Update all boosted wineries of the district at once
+            df.loc[boost_indices, 'recency_score'] = boost_scores[boost_positions]
+            df.loc[boost_indices, 'recency_category'] = 'likely_recent'
+            df.loc[boost_indices, 'is_recent'] = True
+            # Add simulated opening dates
+            days_ago = boost_days_ago[boost_positions]
+            opening_dates = now - pd.to_timedelta(days_ago, unit='D')
+            df.loc[boost_indices, 'start_date'] = opening_dates.strftime('%Y-%m-%d')
     
     return df
 
@@ -179,25 +225,32 @@ def save_enhanced_data(df):
     
     # Save to JSON
     json_filename = '../data/berlin_wineries_recent.json'
-    records = df.to_dict('records')
-    with open(json_filename, 'w', encoding='utf-8') as f:
-        json.dump(records, f, indent=2, ensure_ascii=False)
+    # Serialize straight from the column arrays so float32 values keep their short form
+    write_json(iter_records({column: df[column].to_numpy() for column in df.columns}), json_filename)
     print(f"Enhanced data saved to {json_filename}")
+    
+    # Save a typed binary copy so the map script can reload it without re-parsing text
+    pickle_filename = '../data/berlin_wineries_recent.pkl'
+    df.reset_index(drop=True).to_pickle(pickle_filename)
+    print(f"Enhanced data saved to {pickle_filename}")
 
 def analyze_results(df):
     """Analyze and report the enhanced dataset."""
     
     print("\n=== ENHANCED TEMPORAL ANALYSIS ===")
     
-    # Count by category
+    # Count by category, with each category's share from the same aggregation
     category_counts = df['recency_category'].value_counts()
+    category_counts = category_counts[category_counts > 0]
+    category_shares = (category_counts / len(df) * 100).round(1)
     print("\nRecency Distribution:")
-    for category, count in category_counts.items():
-        print(f"  {category}: {count}")
+    for category, count, share in zip(category_counts.index, category_counts, category_shares):
+        print(f"  {category}: {count} ({share}%)")
     
     # Recent wineries by district
     recent_df = df[df['is_recent'] == True]
     district_counts = recent_df['district'].value_counts()
+    district_counts = district_counts[district_counts > 0]
     
     print(f"\nRecent Wineries by District ({len(recent_df)} total):")
     for district, count in district_counts.items():
@@ -209,7 +262,7 @@ def analyze_results(df):
         for i, (idx, winery) in enumerate(recent_df.head(5).iterrows()):
             print(f"  {i+1}. {winery['name']} ({winery['district']})")
             print(f"     Category: {winery['recency_category']}")
-            print(f"     Score: {winery['recency_score']}")
+            print(f"     Score: {winery['recency_score']:.2f}")
             if winery['start_date']:
                 print(f"     Estimated opening: {winery['start_date']}")
 
@@ -223,11 +276,14 @@ def main():
     if df is None:
         return
     
+    # Seeded generator shared by both steps for reproducible results
+    rng = np.random.default_rng(42)
+    
     # Add temporal analysis
-    enhanced_df = add_temporal_analysis(df)
+    enhanced_df = add_temporal_analysis_parallel(df, rng)
     
     # Boost specific districts for demonstration
-    enhanced_df = boost_specific_districts(enhanced_df)
+    enhanced_df = boost_specific_districts(enhanced_df, rng)
     
     # Save enhanced data
     save_enhanced_data(enhanced_df)
@@ -4,23 +4,42 @@ Create a map visualization highlighting Berlin districts with recently opened wi
 to identify areas with upcoming winery supply growth.
 """
 
+import os
 import pandas as pd
 import folium
-from folium.plugins import HeatMap
+from folium.plugins import FastMarkerCluster, HeatMap
 import json
 import numpy as np
 from datetime import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from map_utils import create_berlin_base_map
+
+# Marker colors by recency category; anything else is shown in light blue
+RECENCY_MARKER_COLORS = {
+    'very_recent': 'red',
+    'recent': 'orange',
+    'likely_recent': 'green',  # Changed from yellow (invalid) to green
+}
+
 def load_recent_wineries_data():
-    """Load the recent wineries data."""
+    """
+    Load the recent wineries data.
+    Prefers the typed pickle written by create_recent_wineries_from_existing.py,
+    unless the CSV has been rewritten since (e.g. by download_recent_wineries.py).
+    """
     try:
         # Try both possible paths
-        try:
-            df = pd.read_csv('../data/berlin_wineries_recent.csv')
-        except FileNotFoundError:
-            df = pd.read_csv('data/berlin_wineries_recent.csv')
+        data_dir = '../data' if os.path.isdir('../data') else 'data'
+        csv_file = os.path.join(data_dir, 'berlin_wineries_recent.csv')
+        pickle_file = os.path.join(data_dir, 'berlin_wineries_recent.pkl')
+        
+        if (os.path.exists(pickle_file) and
+                (not os.path.exists(csv_file) or os.path.getmtime(pickle_file) >= os.path.getmtime(csv_file))):
+            df = pd.read_pickle(pickle_file)
+        else:
+            df = pd.read_csv(csv_file)
         print(f"Loaded {len(df)} wineries with temporal data")
         return df
     except FileNotFoundError:
@@ -33,17 +52,14 @@ def analyze_district_trends(df):
     # Filter for recent wineries only
     recent_df = df[df['is_recent'] == True].copy()
     
-    # Count by district
-    district_counts = recent_df['district'].value_counts()
+    # Calculate recency metrics by district; observed=True skips unused categories
+    # when district is categorical
+    district_stats = df.groupby('district', observed=True).agg(
+        recent_count=('is_recent', 'sum'),  # Count of recent wineries
+        avg_recency_score=('recency_score', 'mean'),  # Average recency score
+        total_count=('name', 'count'),  # Total wineries
+    ).astype({'avg_recency_score': 'float64'}).round({'avg_recency_score': 2})
     
-    # Calculate recency metrics by district
-    district_stats = df.groupby('district').agg({
-        'is_recent': 'sum',  # Count of recent wineries
-        'recency_score': 'mean',  # Average recency score
-        'name': 'count'  # Total wineries
-    }).round(2)
-    
-    district_stats.columns = ['recent_count', 'avg_recency_score', 'total_count']
     district_stats['recent_percentage'] = (district_stats['recent_count'] / district_stats['total_count'] * 100).round(1)
     
     # Sort by recent count
@@ -63,23 +79,12 @@ def analyze_district_trends(df):
 def create_recent_wineries_interactive_map(df, district_stats):
     """Create an interactive map highlighting recent winery activity."""
     
-    # Berlin center coordinates
-    berlin_center = [52.520008, 13.404954]
-    
-    # Create base map
-    m = folium.Map(
-        location=berlin_center,
-        zoom_start=11,
-        tiles='cartodbpositron'
+    # Create base map with title
+    m = create_berlin_base_map(
+        title="Berlin Recent Wineries Map (Last 2 Years)",
+        subtitle="Districts with Emerging Winery Supply"
     )
     
-    # Add title
-    title_html = '''
-    <h3 align="center" style="font-size:20px"><b>Berlin Recent Wineries Map (Last 2 Years)</b></h3>
-    <p align="center" style="font-size:14px">Districts with Emerging Winery Supply</p>
-    '''
-    m.get_root().html.add_child(folium.Element(title_html))
-    
     # Color scheme for districts based on recent activity
     def get_district_color(district, recent_count):
         if recent_count >= 5:
@@ -140,50 +145,59 @@ def create_recent_wineries_interactive_map(df, district_stats):
     # Add individual winery markers
     recent_wineries = df[df['is_recent'] == True]
     
-    for idx, winery in recent_wineries.iterrows():
-        lat = winery['latitude']
-        lon = winery['longitude']
-        name = winery['name']
-        district = winery['district']
-        recency_score = winery['recency_score']
-        category = winery['recency_category']
-        
-        # Color based on recency category
-        if category == 'very_recent':
-            marker_color = 'red'
-            icon = 'star'
-        elif category == 'recent':
-            marker_color = 'orange'
-            icon = 'wine-bottle'
-        elif category == 'likely_recent':
-            marker_color = 'green'  # Changed from yellow (invalid) to green
-            icon = 'wine-bottle'
-        else:
-            marker_color = 'lightblue'
-            icon = 'wine-bottle'
-        
-        popup_text = f"""
-        <b>{name}</b><br>
-        District: {district}<br>
-        Category: {category}<br>
-        Recency score: {recency_score}<br>
-        """
-        
-        if winery.get('start_date') and str(winery.get('start_date')) != 'nan':
-            popup_text += f"Opening date: {winery['start_date']}<br>"
-        if winery.get('osm_timestamp') and str(winery.get('osm_timestamp')) != 'nan':
-            popup_text += f"OSM added: {str(winery['osm_timestamp'])[:10]}<br>"
-        
-        folium.Marker(
-            location=[lat, lon],
-            popup=folium.Popup(popup_text, max_width=250),
-            tooltip=name,
-            icon=folium.Icon(color=marker_color, icon=icon, prefix='fa')
+    # Color and icon based on recency category
+    category = recent_wineries['recency_category'].astype(str)
+    marker_colors = category.map(RECENCY_MARKER_COLORS).fillna('lightblue')
+    icons = np.where(category == 'very_recent', 'star', 'wine-bottle')
+    
+    # Build every popup in one vectorized string concatenation, appending the
+    # optional date lines only where a date is present
+    def optional_popup_line(column, label, length=None):
+        if column not in recent_wineries:
+            return ''
+        text = recent_wineries[column].astype(str)
+        present = recent_wineries[column].notna() & (text != '') & (text != 'nan')
+        if length is not None:
+            text = text.str[:length]
+        return np.where(present, label + text + "<br>", '')
+    
+    popup_texts = (
+        "\n        <b>" + recent_wineries['name'].astype(str) + "</b><br>\n"
+        "        District: " + recent_wineries['district'].astype(str) + "<br>\n"
+        "        Category: " + category + "<br>\n"
+        "        Recency score: " + recent_wineries['recency_score'].astype(str) + "<br>\n        "
+        + optional_popup_line('start_date', "Opening date: ")
+        + optional_popup_line('osm_timestamp', "OSM added: ", length=10)
+    )
+    
+    # Add the winery markers as one clustered layer built in the browser
+    marker_callback = """
+    function (row) {
+        var icon = L.AwesomeMarkers.icon({
+            icon: row[5], markerColor: row[4], iconColor: 'white', prefix: 'fa'
+        });
+        var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+        marker.bindPopup(row[2], {maxWidth: 250});
+        marker.bindTooltip(row[3]);
+        return marker;
+    };
+    """
+    if len(recent_wineries) > 0:
+        FastMarkerCluster(
+            pd.DataFrame({
+                'latitude': recent_wineries['latitude'],
+                'longitude': recent_wineries['longitude'],
+                'popup': popup_texts,
+                'name': recent_wineries['name'].astype(str),
+                'marker_color': marker_colors,
+                'icon': icons,
+            }).values.tolist(),
+            callback=marker_callback,
+            name='Recent Wineries'
         ).add_to(m)
     
     # Add heatmap layer for recent wineries
-    recent_coordinates = [[row['latitude'], row['longitude'], row['recency_score']] 
-                         for idx, row in recent_wineries.iterrows()]
+    recent_coordinates = recent_wineries[['latitude', 'longitude', 'recency_score']].to_numpy().tolist()
     
     if recent_coordinates:
         HeatMap(
@@ -243,10 +257,7 @@ def create_district_trend_chart(district_stats):
     ax1.set_xticklabels(top_districts.index, rotation=45, ha='right')
     
     # Add value labels on bars
-    for i, bar in enumerate(bars1):
-        height = bar.get_height()
-        ax1.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                f'{int(height)}', ha='center', va='bottom')
+    ax1.bar_label(bars1, fmt='%d', padding=2)
     
     # Chart 2: Recent percentage by district
     bars2 = ax2.bar(range(len(top_districts)), top_districts['recent_percentage'], 
@@ -258,10 +269,7 @@ def create_district_trend_chart(district_stats):
     ax2.set_xticklabels(top_districts.index, rotation=45, ha='right')
     
     # Add value labels on bars
-    for i, bar in enumerate(bars2):
-        height = bar.get_height()
-        ax2.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                f'{height:.1f}%', ha='center', va='bottom')
+    ax2.bar_label(bars2, fmt='%.1f%%', padding=2)
     
     plt.tight_layout()
     
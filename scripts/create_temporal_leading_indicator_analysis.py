@@ -4,298 +4,416 @@ Temporal analysis of winery growth vs real estate prices to test if winery growt
 is a leading indicator for real estate appreciation in Berlin (2014-2024).
 """
 
+import argparse
+import hashlib
+import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
 import json
-from scipy.stats import pearsonr
-from scipy.signal import correlate
+from scipy.stats import pearsonr, t as student_t
 import warnings
-warnings.filterwarnings('ignore')
 
-def get_annual_real_estate_data():
+# Set the chart style once rather than on every render
+plt.style.use('default')
+
+# Key districts with strong patterns, shown in the timeline and peak timing charts
+KEY_DISTRICTS = ['Neukölln', 'Wedding', 'Friedrichshain', 'Kreuzberg', 'Prenzlauer Berg', 'Mitte']
+
+# Top performers that get their own dual timeline and lag analysis
+TOP_DISTRICTS = ['Neukölln', 'Wedding', 'Friedrichshain']
+
+# Years covered by the analysis; the last one is the end state without a growth rate
+YEARS = list(range(2014, 2025))
+
+# Real estate appreciation patterns by district (annual rates)
+REAL_ESTATE_PATTERNS = {
+    'Neukölln': {
+        'base_price_2014': 2400,
+        'annual_rates': [0.03, 0.05, 0.08, 0.12, 0.15, 0.18, 0.14, 0.10, 0.08, 0.06, 0.04],  # Explosive 2017-2020
+        'volatility': 0.15
+    },
+    'Wedding': {
+        'base_price_2014': 2100,
+        'annual_rates': [0.02, 0.03, 0.04, 0.05, 0.06, 0.08, 0.12, 0.15, 0.18, 0.14, 0.10],  # Late acceleration
+        'volatility': 0.12
+    },
+    'Friedrichshain': {
+        'base_price_2014': 3200,
+        'annual_rates': [0.04, 0.06, 0.09, 0.12, 0.15, 0.12, 0.10, 0.08, 0.06, 0.05, 0.04],  # Tech boom 2016-2019
+        'volatility': 0.10
+    },
+    'Kreuzberg': {
+        'base_price_2014': 3400,
+        'annual_rates': [0.05, 0.07, 0.10, 0.12, 0.09, 0.08, 0.07, 0.06, 0.05, 0.04, 0.03],  # Early adopter, then stable
+        'volatility': 0.08
+    },
+    'Prenzlauer Berg': {
+        'base_price_2014': 4200,
+        'annual_rates': [0.08, 0.10, 0.09, 0.07, 0.06, 0.05, 0.04, 0.04, 0.03, 0.03, 0.02],  # Early boom, then mature
+        'volatility': 0.06
+    },
+    'Mitte': {
+        'base_price_2014': 4500,
+        'annual_rates': [0.06, 0.08, 0.09, 0.08, 0.07, 0.06, 0.05, 0.04, 0.04, 0.03, 0.03],  # Steady premium growth
+        'volatility': 0.05
+    }
+}
+
+# Winery growth patterns by district (based on cultural development cycles)
+WINERY_PATTERNS = {
+    'Neukölln': {
+        'base_count_2014': 2,
+        'growth_phases': [
+            (2014, 2016, 0.1),    # Slow start
+            (2017, 2019, 0.4),    # Discovery phase
+            (2020, 2022, 0.6),    # Boom phase
+            (2023, 2024, 0.3)     # Maturation
+        ],
+        'volatility': 0.3
+    },
+    'Wedding': {
+        'base_count_2014': 1,
+        'growth_phases': [
+            (2014, 2017, 0.05),   # Very slow start
+            (2018, 2020, 0.3),    # Early adoption
+            (2021, 2023, 0.5),    # Rapid growth
+            (2024, 2024, 0.4)     # Continued growth
+        ],
+        'volatility': 0.4
+    },
+    'Friedrichshain': {
+        'base_count_2014': 4,
+        'growth_phases': [
+            (2014, 2015, 0.2),    # Tech money early
+            (2016, 2018, 0.5),    # Tech boom
+            (2019, 2021, 0.4),    # Sustained growth
+            (2022, 2024, 0.2)     # Maturing
+        ],
+        'volatility': 0.25
+    },
+    'Kreuzberg': {
+        'base_count_2014': 6,
+        'growth_phases': [
+            (2014, 2016, 0.3),    # Cultural scene growth
+            (2017, 2019, 0.4),    # Peak cultural period
+            (2020, 2022, 0.2),    # Stabilizing
+            (2023, 2024, 0.1)     # Mature market
+        ],
+        'volatility': 0.2
+    },
+    'Prenzlauer Berg': {
+        'base_count_2014': 8,
+        'growth_phases': [
+            (2014, 2017, 0.25),   # Established growth
+            (2018, 2020, 0.15),   # Slowing
+            (2021, 2024, 0.05)    # Mature/saturated
+        ],
+        'volatility': 0.15
+    },
+    'Mitte': {
+        'base_count_2014': 10,
+        'growth_phases': [
+            (2014, 2017, 0.2),    # Tourist-driven growth
+            (2018, 2021, 0.1),    # Steady but slower
+            (2022, 2024, 0.05)    # Very mature
+        ],
+        'volatility': 0.1
+    }
+}
+
+def phase_rate_table(patterns, years):
+    """
+    Materialize the growth phases of every district as a (district, year) rate array.
+    Years outside every phase get 0; where phases overlap the first one listed wins.
+    """
+    years = np.asarray(years)
+    table = np.zeros((len(patterns), len(years)))
+    for i, pattern in enumerate(patterns.values()):
+        # Walk the phases backwards so the first matching phase is written last
+        for start_year, end_year, rate in reversed(pattern['growth_phases']):
+            table[i, (start_year <= years) & (years <= end_year)] = rate
+    return table
+
+# Phase growth rate of every district for each growth year (2024 excluded)
+WINERY_PHASE_RATES = phase_rate_table(WINERY_PATTERNS, YEARS[:-1])
+
+def get_annual_real_estate_data(rng):
     """
     Generate realistic annual real estate price data for Berlin districts (2014-2024).
     Based on actual Berlin market trends with monthly granularity.
+    Randomness is drawn from rng.
     """
     
-    years = list(range(2014, 2025))
-    
-    # Real estate appreciation patterns by district (annual rates)
-    district_patterns = {
-        'Neukölln': {
-            'base_price_2014': 2400,
-            'annual_rates': [0.03, 0.05, 0.08, 0.12, 0.15, 0.18, 0.14, 0.10, 0.08, 0.06, 0.04],  # Explosive 2017-2020
-            'volatility': 0.15
-        },
-        'Wedding': {
-            'base_price_2014': 2100,
-            'annual_rates': [0.02, 0.03, 0.04, 0.05, 0.06, 0.08, 0.12, 0.15, 0.18, 0.14, 0.10],  # Late acceleration
-            'volatility': 0.12
-        },
-        'Friedrichshain': {
-            'base_price_2014': 3200,
-            'annual_rates': [0.04, 0.06, 0.09, 0.12, 0.15, 0.12, 0.10, 0.08, 0.06, 0.05, 0.04],  # Tech boom 2016-2019
-            'volatility': 0.10
-        },
-        'Kreuzberg': {
-            'base_price_2014': 3400,
-            'annual_rates': [0.05, 0.07, 0.10, 0.12, 0.09, 0.08, 0.07, 0.06, 0.05, 0.04, 0.03],  # Early adopter, then stable
-            'volatility': 0.08
-        },
-        'Prenzlauer Berg': {
-            'base_price_2014': 4200,
-            'annual_rates': [0.08, 0.10, 0.09, 0.07, 0.06, 0.05, 0.04, 0.04, 0.03, 0.03, 0.02],  # Early boom, then mature
-            'volatility': 0.06
-        },
-        'Mitte': {
-            'base_price_2014': 4500,
-            'annual_rates': [0.06, 0.08, 0.09, 0.08, 0.07, 0.06, 0.05, 0.04, 0.04, 0.03, 0.03],  # Steady premium growth
-            'volatility': 0.05
-        }
-    }
-    
-    real_estate_data = []
-    
-    for district, pattern in district_patterns.items():
-        price = pattern['base_price_2014']
-        
-        for i, year in enumerate(years[:-1]):  # Exclude 2024 from rates (it's end state)
-            # Add some randomness
-            annual_rate = pattern['annual_rates'][i] + np.random.normal(0, pattern['volatility']/10)
-            annual_rate = max(0, annual_rate)  # No negative growth
-            
-            # Calculate price for this year
-            price_start_year = price
-            price_end_year = price * (1 + annual_rate)
-            
-            real_estate_data.append({
-                'district': district,
-                'year': year,
-                'price_eur_sqm': price_start_year,
-                'annual_growth_rate': annual_rate,
-                'price_change_eur': price_end_year - price_start_year
-            })
-            
-            price = price_end_year
-        
-        # Add final year data
-        real_estate_data.append({
-            'district': district,
-            'year': 2024,
-            'price_eur_sqm': price,
-            'annual_growth_rate': 0,  # End state
-            'price_change_eur': 0
-        })
-    
-    return pd.DataFrame(real_estate_data)
-
-def get_annual_winery_growth_data():
+    patterns = list(REAL_ESTATE_PATTERNS.values())
+    n_districts, n_rates = len(patterns), len(YEARS) - 1  # 2024 is the end state, it has no rate
+
+    # One row of annual rates per district, plus randomness
+    rates = np.array([pattern['annual_rates'][:n_rates] for pattern in patterns])
+    volatility = np.array([pattern['volatility'] for pattern in patterns])
+    rates += rng.standard_normal(rates.shape) * (volatility[:, None] / 10)
+    np.clip(rates, 0, None, out=rates)  # No negative growth
+
+    # Price at the start of every year, chained from the 2014 base price
+    base_prices = np.array([pattern['base_price_2014'] for pattern in patterns], dtype=float)
+    prices = np.cumprod(np.column_stack([base_prices, 1 + rates]), axis=1)
+
+    # The final year keeps its end-state price with zero growth
+    end_state = np.zeros((n_districts, 1))
+
+    return pd.DataFrame({
+        'district': np.repeat(list(REAL_ESTATE_PATTERNS), len(YEARS)),
+        'year': np.tile(YEARS, n_districts),
+        'price_eur_sqm': prices.ravel(),
+        'annual_growth_rate': np.hstack([rates, end_state]).ravel(),
+        'price_change_eur': np.hstack([np.diff(prices, axis=1), end_state]).ravel()
+    })
+
+def get_annual_winery_growth_data(rng):
     """
     Generate annual winery count growth data based on historical development patterns.
+    Randomness is drawn from rng.
     """
     
-    years = list(range(2014, 2025))
-    
-    # Winery growth patterns by district (based on cultural development cycles)
-    winery_patterns = {
-        'Neukölln': {
-            'base_count_2014': 2,
-            'growth_phases': [
-                (2014, 2016, 0.1),    # Slow start
-                (2017, 2019, 0.4),    # Discovery phase
-                (2020, 2022, 0.6),    # Boom phase
-                (2023, 2024, 0.3)     # Maturation
-            ],
-            'volatility': 0.3
-        },
-        'Wedding': {
-            'base_count_2014': 1,
-            'growth_phases': [
-                (2014, 2017, 0.05),   # Very slow start
-                (2018, 2020, 0.3),    # Early adoption
-                (2021, 2023, 0.5),    # Rapid growth
-                (2024, 2024, 0.4)     # Continued growth
-            ],
-            'volatility': 0.4
-        },
-        'Friedrichshain': {
-            'base_count_2014': 4,
-            'growth_phases': [
-                (2014, 2015, 0.2),    # Tech money early
-                (2016, 2018, 0.5),    # Tech boom
-                (2019, 2021, 0.4),    # Sustained growth
-                (2022, 2024, 0.2)     # Maturing
-            ],
-            'volatility': 0.25
-        },
-        'Kreuzberg': {
-            'base_count_2014': 6,
-            'growth_phases': [
-                (2014, 2016, 0.3),    # Cultural scene growth
-                (2017, 2019, 0.4),    # Peak cultural period
-                (2020, 2022, 0.2),    # Stabilizing
-                (2023, 2024, 0.1)     # Mature market
-            ],
-            'volatility': 0.2
-        },
-        'Prenzlauer Berg': {
-            'base_count_2014': 8,
-            'growth_phases': [
-                (2014, 2017, 0.25),   # Established growth
-                (2018, 2020, 0.15),   # Slowing
-                (2021, 2024, 0.05)    # Mature/saturated
-            ],
-            'volatility': 0.15
-        },
-        'Mitte': {
-            'base_count_2014': 10,
-            'growth_phases': [
-                (2014, 2017, 0.2),    # Tourist-driven growth
-                (2018, 2021, 0.1),    # Steady but slower
-                (2022, 2024, 0.05)    # Very mature
-            ],
-            'volatility': 0.1
-        }
-    }
-    
-    winery_data = []
-    
-    for district, pattern in winery_patterns.items():
-        count = pattern['base_count_2014']
-        
-        for year in years[:-1]:  # Exclude 2024 as endpoint
-            # Find growth rate for this year
-            growth_rate = 0
-            for start_year, end_year, rate in pattern['growth_phases']:
-                if start_year <= year <= end_year:
-                    growth_rate = rate
-                    break
-            
-            # Add volatility
-            growth_rate += np.random.normal(0, pattern['volatility']/5)
-            growth_rate = max(0, growth_rate)  # No negative growth
-            
-            count_start_year = count
-            count_end_year = count * (1 + growth_rate)
-            
-            winery_data.append({
-                'district': district,
-                'year': year,
-                'winery_count': count_start_year,
-                'annual_growth_rate': growth_rate,
-                'winery_growth_absolute': count_end_year - count_start_year
-            })
-            
-            count = count_end_year
-        
-        # Add final year
-        winery_data.append({
-            'district': district,
-            'year': 2024,
-            'winery_count': count,
-            'annual_growth_rate': 0,
-            'winery_growth_absolute': 0
-        })
-    
-    return pd.DataFrame(winery_data)
+    patterns = list(WINERY_PATTERNS.values())
+    n_districts = len(patterns)
+
+    # Phase growth rate of each year (precomputed table) plus volatility
+    volatility = np.array([pattern['volatility'] for pattern in patterns])
+    rates = WINERY_PHASE_RATES + rng.standard_normal(WINERY_PHASE_RATES.shape) * (volatility[:, None] / 5)
+    np.clip(rates, 0, None, out=rates)  # No negative growth
+
+    # Winery count at the start of every year, chained from the 2014 base count
+    base_counts = np.array([pattern['base_count_2014'] for pattern in patterns], dtype=float)
+    counts = np.cumprod(np.column_stack([base_counts, 1 + rates]), axis=1)
+
+    # The final year keeps its end-state count with zero growth
+    end_state = np.zeros((n_districts, 1))
+
+    return pd.DataFrame({
+        'district': np.repeat(list(WINERY_PATTERNS), len(YEARS)),
+        'year': np.tile(YEARS, n_districts),
+        'winery_count': counts.ravel(),
+        'annual_growth_rate': np.hstack([rates, end_state]).ravel(),
+        'winery_growth_absolute': np.hstack([np.diff(counts, axis=1), end_state]).ravel()
+    })
+
+def frame_digest(df):
+    """Hash the column names and every value of a DataFrame."""
+    digest = hashlib.blake2b(','.join(df.columns).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def save_csv_if_changed(df, output_file):
+    """
+    Write df to output_file unless the existing file was written from identical data.
+    The data hash is kept next to the CSV in output_file + '.hash'.
+    Returns True when the CSV was (re)written.
+    """
+    data_hash = frame_digest(df)
+    hash_file = output_file + '.hash'
+    if os.path.exists(output_file) and os.path.exists(hash_file):
+        with open(hash_file) as f:
+            if f.read().strip() == data_hash:
+                print(f"{output_file} is up to date, skipping write")
+                return False
+    
+    df.to_csv(output_file, index=False)
+    with open(hash_file, 'w') as f:
+        f.write(data_hash)
+    return True
+
+def quiet_pearsonr(x, y):
+    """pearsonr with its RuntimeWarnings (e.g. for constant input) silenced."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return pearsonr(x, y)
+
+def lagged_pearson(x, y, max_lag):
+    """
+    Pearson correlation of x[i] against y[i + lag] for every lag in -max_lag..max_lag.
+    x and y may hold several series stacked along their first axis (one per district),
+    which are all correlated in the same vectorized pass.
+    Returns (lags, r, p_values) with one column of r and p_values per lag. The cross
+    products for all lags come from a single FFT and the per-lag sums from prefix sums,
+    so each r equals pearsonr on the overlapping slices without slicing the series.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = x.shape[-1]
+    lags = np.arange(-max_lag, max_lag + 1)
+
+    # Centering leaves every correlation unchanged but keeps the sums well conditioned
+    x = x - x.mean(axis=-1, keepdims=True)
+    y = y - y.mean(axis=-1, keepdims=True)
+
+    # sum(x[i] * y[i + lag]) for every lag; zero-padding keeps the FFT from wrapping around
+    nfft = 1 << (2 * n - 1).bit_length()
+    cross = np.fft.irfft(np.conj(np.fft.rfft(x, nfft)) * np.fft.rfft(y, nfft), nfft)
+    sum_xy = cross[..., lags % nfft]
+
+    # Overlapping window of each series at every lag
+    m = n - np.abs(lags)
+    x_start = np.maximum(0, -lags)
+    y_start = np.maximum(0, lags)
+
+    def window_sums(values, start):
+        prefix = np.concatenate([np.zeros(values.shape[:-1] + (1,)), np.cumsum(values, axis=-1)], axis=-1)
+        return prefix[..., start + m] - prefix[..., start]
+
+    sum_x, sum_xx = window_sums(x, x_start), window_sums(x * x, x_start)
+    sum_y, sum_yy = window_sums(y, y_start), window_sums(y * y, y_start)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = (m * sum_xy - sum_x * sum_y) / np.sqrt((m * sum_xx - sum_x ** 2) * (m * sum_yy - sum_y ** 2))
+        r = np.clip(r, -1.0, 1.0)
+
+        # Two-sided p-value of the t statistic with m - 2 degrees of freedom
+        dof = m - 2
+        t_stat = np.abs(r) * np.sqrt(dof / (1 - r * r))
+        p_values = 2 * student_t.sf(t_stat, dof)
+
+    # A lag needs at least two overlapping years to correlate anything
+    r[..., m < 2] = np.nan
+    p_values[..., m < 2] = np.nan
+    p_values[..., m == 2] = 1.0
+
+    return lags, r, p_values
+
+def lag_correlations(lags, r, p_values):
+    """Package one series' lagged correlations as a frame with lag, correlation and p_value columns."""
+    return pd.DataFrame({'lag': lags, 'correlation': r, 'p_value': p_values})
+
+def best_lag_correlation(cross_corr):
+    """Return (lag, correlation, p_value) of the highest correlation in a lag frame."""
+    best = cross_corr['correlation'].idxmax()
+    return cross_corr.at[best, 'lag'], cross_corr.at[best, 'correlation'], cross_corr.at[best, 'p_value']
+
+def describe_lag(lag):
+    """Human-readable meaning of a lag between winery and real estate growth."""
+    if lag == 0:
+        return 'simultaneous'
+    if lag > 0:
+        return f'winery leads by {lag} year(s)'
+    return f'real estate leads by {abs(lag)} year(s)'
 
 def calculate_cross_correlation(x, y, max_lag=3):
     """
     Calculate cross-correlation between two time series with different lags.
     Tests if x (winery growth) leads y (real estate growth).
+    Returns one row per lag with its correlation and p_value.
     """
-    
-    correlations = {}
-    
+
     # Ensure same length
     min_len = min(len(x), len(y))
     x = x[:min_len]
     y = y[:min_len]
+
+    return lag_correlations(*lagged_pearson(x, y, max_lag))
+
+def yearly_average_growth(winery_df, real_estate_df):
+    """
+    Average winery and real estate growth rate per year across all districts.
+    Both frames are joined on (district, year) so a single groupby yields both averages.
+    """
+    growth = winery_df[['district', 'year', 'annual_growth_rate']].merge(
+        real_estate_df[['district', 'year', 'annual_growth_rate']],
+        on=['district', 'year'], suffixes=('_winery', '_re')
+    )
+    averages = growth.groupby('year')[['annual_growth_rate_winery', 'annual_growth_rate_re']].mean()
+    return averages['annual_growth_rate_winery'], averages['annual_growth_rate_re']
+
+def district_series(df):
+    """
+    Map each district to its (years, annual_growth_rate) arrays in year order, so the
+    charts index plain arrays instead of filtering the frame once per district.
+    """
+    df = df.sort_values(['district', 'year'])
+    return {
+        district: (group['year'].to_numpy(), group['annual_growth_rate'].to_numpy())
+        for district, group in df.groupby('district', sort=False)
+    }
+
+def compute_analysis(winery_df, real_estate_df, winery_series, re_series):
+    """
+    Compute the lag correlations and peak timing the charts and report are built on.
+    Expects the growth years only (2024 excluded) and their district_series lookups.
+    Returns (lag_results, peak_df).
+    """
     
-    for lag in range(-max_lag, max_lag + 1):
-        if lag == 0:
-            # Simultaneous correlation
-            corr, p_val = pearsonr(x, y)
-        elif lag > 0:
-            # Winery leads real estate by 'lag' years
-            if len(x) > lag:
-                corr, p_val = pearsonr(x[:-lag], y[lag:])
-            else:
-                corr, p_val = np.nan, np.nan
-        else:  # lag < 0
-            # Real estate leads winery by abs(lag) years
-            if len(y) > abs(lag):
-                corr, p_val = pearsonr(x[abs(lag):], y[:lag])
-            else:
-                corr, p_val = np.nan, np.nan
-        
-        correlations[lag] = {
-            'correlation': corr,
-            'p_value': p_val,
-            'interpretation': 'simultaneous' if lag == 0 else 
-                           f'winery leads by {lag} year(s)' if lag > 0 else
-                           f'real estate leads by {abs(lag)} year(s)'
-        }
+    # Analyze cross-correlations for the top districts, all in one batched call
+    winery_rates = np.stack([winery_series[district][1] for district in TOP_DISTRICTS])
+    re_rates = np.stack([re_series[district][1] for district in TOP_DISTRICTS])
+
+    lags, r, p_values = lagged_pearson(winery_rates, re_rates, max_lag=2)
+    lag_results = {
+        district: lag_correlations(lags, r[i], p_values[i])
+        for i, district in enumerate(TOP_DISTRICTS)
+    }
     
-    return correlations
+    # Find peak years of every key district in one grouped pass per frame
+    # (sort=False keeps the districts in data order, which matches KEY_DISTRICTS)
+    winery_ok = winery_df[winery_df['district'].isin(KEY_DISTRICTS)]
+    re_ok = real_estate_df[real_estate_df['district'].isin(KEY_DISTRICTS)]
+
+    winery_peaks = winery_ok.loc[winery_ok.groupby('district', sort=False)['annual_growth_rate'].idxmax(),
+                                 ['district', 'year']].rename(columns={'year': 'winery_peak'})
+    re_peaks = re_ok.loc[re_ok.groupby('district', sort=False)['annual_growth_rate'].idxmax(),
+                         ['district', 'year']].rename(columns={'year': 're_peak'})
+
+    peak_df = winery_peaks.merge(re_peaks, on='district')
+    peak_df['lead_time'] = peak_df['re_peak'] - peak_df['winery_peak']
+
+    return lag_results, peak_df
 
-def create_temporal_analysis_charts(winery_df, real_estate_df):
+def render_charts(winery_series, re_series, avg_winery, avg_re, lag_results, peak_df, dpi=150):
     """
     Create comprehensive temporal analysis charts showing the relationship between
     winery growth and real estate appreciation over time.
+    Takes the district_series lookups, the yearly average growth rates and the
+    results of compute_analysis. Returns the path of the saved PNG.
     """
     
-    plt.style.use('default')
-    fig = plt.figure(figsize=(24, 18))
+    fig, axes = plt.subplots(3, 3, figsize=(24, 18))
     
-    # Focus on key districts with strong patterns
-    key_districts = ['Neukölln', 'Wedding', 'Friedrichshain', 'Kreuzberg', 'Prenzlauer Berg', 'Mitte']
+    # Growth rates of the key districts as (district, year) matrices; all share the same years
+    years = winery_series[KEY_DISTRICTS[0]][0]
+    winery_matrix = np.stack([winery_series[district][1] for district in KEY_DISTRICTS])
+    re_matrix = np.stack([re_series[district][1] for district in KEY_DISTRICTS])
     
     # Chart 1: Time Series - Winery Growth Rates
-    ax1 = plt.subplot(3, 3, 1)
+    ax1 = axes[0, 0]
     
-    for district in key_districts:
-        district_winery = winery_df[winery_df['district'] == district]
-        # Exclude 2024 (no growth rate)
-        district_winery = district_winery[district_winery['year'] < 2024]
-        
-        ax1.plot(district_winery['year'], district_winery['annual_growth_rate'] * 100, 
-                marker='o', linewidth=2, label=district, alpha=0.8)
+    # One plot call draws a line per district, cycling through the default colors
+    lines = ax1.plot(years, winery_matrix.T * 100, marker='o', linewidth=2, alpha=0.8)
     
     ax1.set_xlabel('Year')
     ax1.set_ylabel('Winery Annual Growth Rate (%)')
     ax1.set_title('Winery Growth Rate Timeline (2014-2023)', fontweight='bold')
-    ax1.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax1.legend(lines, KEY_DISTRICTS, bbox_to_anchor=(1.05, 1), loc='upper left')
     ax1.grid(True, alpha=0.3)
     ax1.set_xlim(2013.5, 2023.5)
     
     # Chart 2: Time Series - Real Estate Growth Rates
-    ax2 = plt.subplot(3, 3, 2)
+    ax2 = axes[0, 1]
     
-    for district in key_districts:
-        district_re = real_estate_df[real_estate_df['district'] == district]
-        # Exclude 2024 (no growth rate)
-        district_re = district_re[district_re['year'] < 2024]
-        
-        ax2.plot(district_re['year'], district_re['annual_growth_rate'] * 100,
-                marker='s', linewidth=2, label=district, alpha=0.8)
+    lines = ax2.plot(years, re_matrix.T * 100, marker='s', linewidth=2, alpha=0.8)
     
     ax2.set_xlabel('Year')
     ax2.set_ylabel('Real Estate Annual Growth Rate (%)')
     ax2.set_title('Real Estate Growth Rate Timeline (2014-2023)', fontweight='bold')
-    ax2.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax2.legend(lines, KEY_DISTRICTS, bbox_to_anchor=(1.05, 1), loc='upper left')
     ax2.grid(True, alpha=0.3)
     ax2.set_xlim(2013.5, 2023.5)
     
     # Chart 3: Overlay - Both Growth Rates (Average across districts)
-    ax3 = plt.subplot(3, 3, 3)
+    ax3 = axes[0, 2]
     
-    # Calculate averages by year
-    avg_winery = winery_df[winery_df['year'] < 2024].groupby('year')['annual_growth_rate'].mean() * 100
-    avg_re = real_estate_df[real_estate_df['year'] < 2024].groupby('year')['annual_growth_rate'].mean() * 100
+    # Averages by year, in percent
+    avg_winery = avg_winery * 100
+    avg_re = avg_re * 100
     
     ax3_twin = ax3.twinx()
     
@@ -319,18 +437,16 @@ def create_temporal_analysis_charts(winery_df, real_estate_df):
     ax3_twin.tick_params(axis='y', labelcolor='orange')
     
     # Chart 4-6: District-specific dual timelines (top performers)
-    top_districts = ['Neukölln', 'Wedding', 'Friedrichshain']
-    
-    for i, district in enumerate(top_districts):
-        ax = plt.subplot(3, 3, 4 + i)
+    for i, district in enumerate(TOP_DISTRICTS):
+        ax = axes[1, i]
         ax_twin = ax.twinx()
         
-        district_winery = winery_df[(winery_df['district'] == district) & (winery_df['year'] < 2024)]
-        district_re = real_estate_df[(real_estate_df['district'] == district) & (real_estate_df['year'] < 2024)]
+        winery_years, winery_rates = winery_series[district]
+        re_years, re_rates = re_series[district]
         
-        line1 = ax.plot(district_winery['year'], district_winery['annual_growth_rate'] * 100,
+        line1 = ax.plot(winery_years, winery_rates * 100,
                        'o-', color='darkgreen', linewidth=2.5, markersize=5, label='Winery Growth')
-        line2 = ax_twin.plot(district_re['year'], district_re['annual_growth_rate'] * 100,
+        line2 = ax_twin.plot(re_years, re_rates * 100,
                             's-', color='darkorange', linewidth=2.5, markersize=5, label='Real Estate Growth')
         
         ax.set_xlabel('Year')
@@ -342,37 +458,21 @@ def create_temporal_analysis_charts(winery_df, real_estate_df):
         ax.tick_params(axis='y', labelcolor='darkgreen')
         ax_twin.tick_params(axis='y', labelcolor='darkorange')
         
-        # Add correlation text
-        winery_rates = district_winery['annual_growth_rate'].values
-        re_rates = district_re['annual_growth_rate'].values
-        if len(winery_rates) == len(re_rates) and len(winery_rates) > 2:
-            corr, p_val = pearsonr(winery_rates, re_rates)
-            ax.text(0.05, 0.95, f'r = {corr:.3f}', transform=ax.transAxes, 
-                   bbox=dict(boxstyle='round', facecolor='white', alpha=0.8),
-                   verticalalignment='top')
+        # Add correlation text (the zero-lag value of the lag analysis)
+        cross_corr = lag_results[district]
+        corr = cross_corr.loc[cross_corr['lag'] == 0, 'correlation'].iloc[0]
+        ax.text(0.05, 0.95, f'r = {corr:.3f}', transform=ax.transAxes, 
+               bbox=dict(boxstyle='round', facecolor='white', alpha=0.8),
+               verticalalignment='top')
     
     # Chart 7: Cross-correlation analysis (lag analysis)
-    ax7 = plt.subplot(3, 3, 7)
-    
-    # Analyze cross-correlations for key districts
-    lag_results = {}
-    
-    for district in ['Neukölln', 'Wedding', 'Friedrichshain']:
-        district_winery = winery_df[(winery_df['district'] == district) & (winery_df['year'] < 2024)]
-        district_re = real_estate_df[(real_estate_df['district'] == district) & (real_estate_df['year'] < 2024)]
-        
-        winery_rates = district_winery['annual_growth_rate'].values
-        re_rates = district_re['annual_growth_rate'].values
-        
-        cross_corr = calculate_cross_correlation(winery_rates, re_rates, max_lag=2)
-        lag_results[district] = cross_corr
+    ax7 = axes[2, 0]
     
     # Plot lag correlations
     lags = list(range(-2, 3))
     
     for district, cross_corr in lag_results.items():
-        correlations = [cross_corr[lag]['correlation'] for lag in lags]
-        ax7.plot(lags, correlations, 'o-', linewidth=2, label=district, markersize=6)
+        ax7.plot(cross_corr['lag'], cross_corr['correlation'], 'o-', linewidth=2, label=district, markersize=6)
     
     ax7.axvline(x=0, color='black', linestyle='--', alpha=0.5)
     ax7.axhline(y=0, color='black', linestyle='-', alpha=0.3)
@@ -385,7 +485,7 @@ def create_temporal_analysis_charts(winery_df, real_estate_df):
     ax7.set_xticklabels([f'{lag}' for lag in lags])
     
     # Chart 8: Cumulative growth comparison
-    ax8 = plt.subplot(3, 3, 8)
+    ax8 = axes[2, 1]
     
     # Calculate cumulative growth for average across districts
     winery_cumulative = (1 + avg_winery/100).cumprod() - 1
@@ -403,26 +503,7 @@ def create_temporal_analysis_charts(winery_df, real_estate_df):
     ax8.grid(True, alpha=0.3)
     
     # Chart 9: Peak timing analysis
-    ax9 = plt.subplot(3, 3, 9)
-    
-    peak_analysis = []
-    
-    for district in key_districts:
-        district_winery = winery_df[(winery_df['district'] == district) & (winery_df['year'] < 2024)]
-        district_re = real_estate_df[(real_estate_df['district'] == district) & (real_estate_df['year'] < 2024)]
-        
-        # Find peak years
-        winery_peak_year = district_winery.loc[district_winery['annual_growth_rate'].idxmax(), 'year']
-        re_peak_year = district_re.loc[district_re['annual_growth_rate'].idxmax(), 'year']
-        
-        peak_analysis.append({
-            'district': district,
-            'winery_peak': winery_peak_year,
-            're_peak': re_peak_year,
-            'lead_time': re_peak_year - winery_peak_year
-        })
-    
-    peak_df = pd.DataFrame(peak_analysis)
+    ax9 = axes[2, 2]
     
     x_pos = np.arange(len(peak_df))
     width = 0.35
@@ -455,17 +536,20 @@ def create_temporal_analysis_charts(winery_df, real_estate_df):
     # Save chart
     try:
         output_file = '../outputs/berlin_temporal_leading_indicator_analysis.png'
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
     except FileNotFoundError:
         output_file = 'outputs/berlin_temporal_leading_indicator_analysis.png'
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
     
     plt.close()
     print(f"Temporal leading indicator analysis charts saved as {output_file}")
-    return output_file, lag_results, peak_df
+    return output_file
 
-def generate_leading_indicator_report(lag_results, peak_df, winery_df, real_estate_df):
-    """Generate comprehensive leading indicator analysis report."""
+def generate_leading_indicator_report(lag_results, peak_df, winery_df, real_estate_df, avg_winery, avg_re):
+    """
+    Generate comprehensive leading indicator analysis report.
+    Expects the growth years only (2024 excluded) and the yearly average growth rates.
+    """
     
     report = f"""
 # Berlin Winery Growth as Leading Indicator for Real Estate Prices (2014-2024)
@@ -480,9 +564,9 @@ This temporal analysis examines whether winery growth precedes real estate appre
 """
     
     # Analyze peak timing
-    leads_count = sum(1 for _, row in peak_df.iterrows() if row['lead_time'] > 0)
-    simultaneous_count = sum(1 for _, row in peak_df.iterrows() if row['lead_time'] == 0)
-    lags_count = sum(1 for _, row in peak_df.iterrows() if row['lead_time'] < 0)
+    leads_count = (peak_df['lead_time'] > 0).sum()
+    simultaneous_count = (peak_df['lead_time'] == 0).sum()
+    lags_count = (peak_df['lead_time'] < 0).sum()
     
     report += f"""
 ### Peak Timing Analysis:
@@ -495,9 +579,9 @@ This temporal analysis examines whether winery growth precedes real estate appre
 ### District-Specific Peak Analysis:
 """
     
-    for _, row in peak_df.iterrows():
-        lead_interpretation = "🚀 LEADING" if row['lead_time'] > 0 else "⚖️ SIMULTANEOUS" if row['lead_time'] == 0 else "📈 LAGGING"
-        report += f"- **{row['district']}**: Winery peak {row['winery_peak']} → Real Estate peak {row['re_peak']} ({lead_interpretation}, {row['lead_time']:.0f} year lead)\n"
+    for row in peak_df.itertuples():
+        lead_interpretation = "🚀 LEADING" if row.lead_time > 0 else "⚖️ SIMULTANEOUS" if row.lead_time == 0 else "📈 LAGGING"
+        report += f"- **{row.district}**: Winery peak {row.winery_peak} → Real Estate peak {row.re_peak} ({lead_interpretation}, {row.lead_time:.0f} year lead)\n"
     
     # Cross-correlation analysis
     report += f"""
@@ -509,8 +593,7 @@ This temporal analysis examines whether winery growth precedes real estate appre
     
     for district, cross_corr in lag_results.items():
         # Find best correlation and its lag
-        best_lag = max(cross_corr.keys(), key=lambda k: cross_corr[k]['correlation'])
-        best_corr = cross_corr[best_lag]['correlation']
+        best_lag, best_corr, best_p = best_lag_correlation(cross_corr)
         
         # Interpretation
         if best_lag > 0:
@@ -527,20 +610,15 @@ This temporal analysis examines whether winery growth precedes real estate appre
 **{district}**:
 - Best correlation: r = {best_corr:.3f} at {interpretation}
 - Indicator type: {strength}
-- P-value: {cross_corr[best_lag]['p_value']:.4f}
+- P-value: {best_p:.4f}
 """
     
-    # Calculate overall statistics
-    avg_winery = winery_df[winery_df['year'] < 2024].groupby('year')['annual_growth_rate'].mean()
-    avg_re = real_estate_df[real_estate_df['year'] < 2024].groupby('year')['annual_growth_rate'].mean()
-    
     # Overall correlation
-    overall_corr, overall_p = pearsonr(avg_winery, avg_re)
+    overall_corr, overall_p = quiet_pearsonr(avg_winery, avg_re)
     
     # Lag correlation for overall data
     overall_cross_corr = calculate_cross_correlation(avg_winery.values, avg_re.values, max_lag=2)
-    best_overall_lag = max(overall_cross_corr.keys(), key=lambda k: overall_cross_corr[k]['correlation'])
-    best_overall_corr = overall_cross_corr[best_overall_lag]['correlation']
+    best_overall_lag, best_overall_corr, _ = best_lag_correlation(overall_cross_corr)
     
     report += f"""
 
@@ -548,7 +626,7 @@ This temporal analysis examines whether winery growth precedes real estate appre
 
 ### Market-Wide Correlations:
 - **Simultaneous correlation**: r = {overall_corr:.3f} (p = {overall_p:.4f})
-- **Best lag correlation**: r = {best_overall_corr:.3f} at {overall_cross_corr[best_overall_lag]['interpretation']}
+- **Best lag correlation**: r = {best_overall_corr:.3f} at {describe_lag(best_overall_lag)}
 
 ### Growth Rate Statistics (2014-2023):
 """
@@ -613,11 +691,8 @@ This temporal analysis examines whether winery growth precedes real estate appre
     # Identify current leading indicator districts
     current_high_winery = winery_df[winery_df['year'] == 2023].nlargest(3, 'annual_growth_rate')
     
-    for _, district in current_high_winery.iterrows():
-        current_re = real_estate_df[(real_estate_df['district'] == district['district']) & 
-                                   (real_estate_df['year'] == 2023)]['annual_growth_rate'].iloc[0]
-        
-        report += f"- **{district['district']}**: High winery growth ({district['annual_growth_rate']:.1%}) may predict real estate acceleration\n"
+    for row in current_high_winery.itertuples():
+        report += f"- **{row.district}**: High winery growth ({row.annual_growth_rate:.1%}) may predict real estate acceleration\n"
     
     report += f"""
 
@@ -626,12 +701,12 @@ This temporal analysis examines whether winery growth precedes real estate appre
 ### Cross-Correlation Results:
 """
     
-    for lag in range(-2, 3):
-        lag_corrs = [cross_corr[lag]['correlation'] for cross_corr in lag_results.values() if not np.isnan(cross_corr[lag]['correlation'])]
-        if lag_corrs:
-            avg_corr = np.mean(lag_corrs)
-            interpretation = "Winery leads" if lag > 0 else "Simultaneous" if lag == 0 else "Real estate leads"
-            report += f"- **{lag} year lag** ({interpretation}): Average r = {avg_corr:.3f}\n"
+    # Average correlation per lag across districts (lags without any value are skipped)
+    avg_lag_corrs = pd.concat(lag_results.values()).groupby('lag')['correlation'].mean().dropna()
+    
+    for lag, avg_corr in avg_lag_corrs.items():
+        interpretation = "Winery leads" if lag > 0 else "Simultaneous" if lag == 0 else "Real estate leads"
+        report += f"- **{lag} year lag** ({interpretation}): Average r = {avg_corr:.3f}\n"
     
     report += f"""
 
@@ -671,61 +746,79 @@ This analysis provides strong evidence that **monitoring winery development can
 
 def main():
     """Main function to create temporal leading indicator analysis."""
+    parser = argparse.ArgumentParser(description="Test winery growth as a leading indicator for Berlin real estate")
+    parser.add_argument("--no-plot", action="store_true",
+                        help="Skip rendering the chart PNG; only write the data, report and summary")
+    args = parser.parse_args()
+    
     print("⏰🍷 Berlin Winery Growth: Leading Indicator Analysis")
     print("=" * 65)
     
     # Generate temporal data
     print("Generating annual time series data...")
-    winery_df = get_annual_winery_growth_data()
-    real_estate_df = get_annual_real_estate_data()
+    # Seeded so repeated runs produce the same series, charts and report;
+    # set the SEED environment variable to simulate a different history
+    rng = np.random.default_rng(int(os.environ.get('SEED', 42)))
+    winery_df = get_annual_winery_growth_data(rng)
+    real_estate_df = get_annual_real_estate_data(rng)
     
     print(f"Generated data for {len(winery_df['district'].unique())} districts over {len(winery_df['year'].unique())} years")
     
     # Save temporal data
     try:
         try:
-            winery_df.to_csv('../data/berlin_winery_annual_growth.csv', index=False)
-            real_estate_df.to_csv('../data/berlin_real_estate_annual_growth.csv', index=False)
+            save_csv_if_changed(winery_df, '../data/berlin_winery_annual_growth.csv')
+            save_csv_if_changed(real_estate_df, '../data/berlin_real_estate_annual_growth.csv')
         except:
-            winery_df.to_csv('data/berlin_winery_annual_growth.csv', index=False)
-            real_estate_df.to_csv('data/berlin_real_estate_annual_growth.csv', index=False)
+            save_csv_if_changed(winery_df, 'data/berlin_winery_annual_growth.csv')
+            save_csv_if_changed(real_estate_df, 'data/berlin_real_estate_annual_growth.csv')
         print("Temporal data saved successfully!")
     except Exception as e:
         print(f"Note: Could not save temporal data: {e}")
     
-    # Create visualizations and analysis
-    print("Creating temporal analysis charts...")
-    chart_file, lag_results, peak_df = create_temporal_analysis_charts(winery_df, real_estate_df)
+    # Everything below analyzes growth years only; 2024 is the end state without a rate
+    winery_growth = winery_df[winery_df['year'] < 2024]
+    re_growth = real_estate_df[real_estate_df['year'] < 2024]
+    winery_series = district_series(winery_growth)
+    re_series = district_series(re_growth)
+    avg_winery, avg_re = yearly_average_growth(winery_growth, re_growth)
+    
+    lag_results, peak_df = compute_analysis(winery_growth, re_growth, winery_series, re_series)
+    
+    # Create visualizations
+    chart_file = None
+    if not args.no_plot:
+        print("Creating temporal analysis charts...")
+        chart_file = render_charts(winery_series, re_series, avg_winery, avg_re, lag_results, peak_df)
     
     print("Generating leading indicator report...")
-    report_file = generate_leading_indicator_report(lag_results, peak_df, winery_df, real_estate_df)
+    report_file = generate_leading_indicator_report(lag_results, peak_df, winery_growth, re_growth,
+                                                    avg_winery, avg_re)
     
     # Print key results
     print(f"\n📊 Leading Indicator Analysis Results:")
     print("-" * 50)
     
     # Peak timing summary
-    leads_count = sum(1 for _, row in peak_df.iterrows() if row['lead_time'] > 0)
+    leads_count = (peak_df['lead_time'] > 0).sum()
     print(f"🎯 Peak Analysis: {leads_count}/{len(peak_df)} districts show winery growth peaking BEFORE real estate")
     print(f"📈 Average lead time: {peak_df['lead_time'].mean():.1f} years")
     
     # Best correlations by district
     print(f"\n🏆 Best Leading Correlations:")
     for district, cross_corr in lag_results.items():
-        best_lag = max(cross_corr.keys(), key=lambda k: cross_corr[k]['correlation'])
-        best_corr = cross_corr[best_lag]['correlation']
+        best_lag, best_corr, _ = best_lag_correlation(cross_corr)
         if best_lag > 0:
             print(f"   {district}: r = {best_corr:.3f} with {best_lag}-year lead")
     
     # Overall market correlation
-    avg_winery = winery_df[winery_df['year'] < 2024].groupby('year')['annual_growth_rate'].mean()
-    avg_re = real_estate_df[real_estate_df['year'] < 2024].groupby('year')['annual_growth_rate'].mean()
-    overall_corr, overall_p = pearsonr(avg_winery, avg_re)
+    overall_corr, overall_p = quiet_pearsonr(avg_winery, avg_re)
     
     print(f"\n🎯 Overall Market Correlation: r = {overall_corr:.3f} (p = {overall_p:.4f})")
     
     print(f"\n🎉 Leading indicator analysis complete! Generated files:")
-    print(f"📊 Temporal analysis charts: {chart_file}")
+    if chart_file:
+        print(f"📊 Temporal analysis charts: {chart_file}")
     print(f"📋 Leading indicator report: {report_file}")
     
     # Conclusion
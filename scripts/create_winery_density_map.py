@@ -4,182 +4,226 @@ Create a winery density map showing wineries per square kilometer by Berlin dist
 This provides a true measure of winery concentration accounting for district size.
 """
 
+import pickle
+from pathlib import Path
+
 import pandas as pd
 import folium
-from folium.plugins import HeatMap
+from folium.plugins import HeatMap, FastMarkerCluster
 import json
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib.patches import Rectangle
 
+from map_utils import create_berlin_base_map
+
+# Project directories, resolved once from this file's location
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data"
+OUTPUTS_DIR = BASE_DIR / "outputs"
+
+WINERY_CSV = DATA_DIR / 'berlin_wineries.csv'
+
+# Wineries with their assigned districts plus the district stats from the last run
+DISTRICT_CACHE_FILE = DATA_DIR / 'berlin_winery_density_districts.pkl'
+
+# Berlin district boundaries with more precise coordinates and area estimates
+DISTRICTS = {
+    'Mitte': {
+        'bounds': {'lat_min': 52.500, 'lat_max': 52.550, 'lon_min': 13.350, 'lon_max': 13.420},
+        'area_km2': 39.5,  # Official area in km²
+        'center': [52.525, 13.385],
+        'population': 383000,
+        'description': 'Historic center, government district'
+    },
+    'Prenzlauer Berg': {
+        'bounds': {'lat_min': 52.520, 'lat_max': 52.560, 'lon_min': 13.400, 'lon_max': 13.450},
+        'area_km2': 10.9,
+        'center': [52.540, 13.425],
+        'population': 165000,
+        'description': 'Trendy residential area'
+    },
+    'Charlottenburg': {
+        'bounds': {'lat_min': 52.490, 'lat_max': 52.530, 'lon_min': 13.280, 'lon_max': 13.350},
+        'area_km2': 64.7,
+        'center': [52.510, 13.315],
+        'population': 129000,
+        'description': 'Western district, shopping area'
+    },
+    'Kreuzberg': {
+        'bounds': {'lat_min': 52.490, 'lat_max': 52.520, 'lon_min': 13.380, 'lon_max': 13.420},
+        'area_km2': 15.2,
+        'center': [52.505, 13.400],
+        'population': 154000,
+        'description': 'Cultural hub, nightlife'
+    },
+    'Neukölln': {
+        'bounds': {'lat_min': 52.450, 'lat_max': 52.500, 'lon_min': 13.400, 'lon_max': 13.470},
+        'area_km2': 44.9,
+        'center': [52.475, 13.435],
+        'population': 329000,
+        'description': 'Diverse, gentrifying area'
+    },
+    'Friedrichshain': {
+        'bounds': {'lat_min': 52.500, 'lat_max': 52.530, 'lon_min': 13.420, 'lon_max': 13.480},
+        'area_km2': 9.8,
+        'center': [52.515, 13.450],
+        'population': 289000,
+        'description': 'Young, alternative scene'
+    },
+    'Schöneberg': {
+        'bounds': {'lat_min': 52.460, 'lat_max': 52.500, 'lon_min': 13.330, 'lon_max': 13.380},
+        'area_km2': 10.5,
+        'center': [52.480, 13.355],
+        'population': 349000,
+        'description': 'LGBTQ+ district, cafes'
+    },
+    'Wedding': {
+        'bounds': {'lat_min': 52.530, 'lat_max': 52.570, 'lon_min': 13.330, 'lon_max': 13.380},
+        'area_km2': 9.5,
+        'center': [52.550, 13.355],
+        'population': 87000,
+        'description': 'Up-and-coming area'
+    },
+    'Tempelhof': {
+        'bounds': {'lat_min': 52.450, 'lat_max': 52.490, 'lon_min': 13.380, 'lon_max': 13.420},
+        'area_km2': 12.2,
+        'center': [52.470, 13.400],
+        'population': 56000,
+        'description': 'Former airport area'
+    },
+    'Steglitz': {
+        'bounds': {'lat_min': 52.440, 'lat_max': 52.480, 'lon_min': 13.310, 'lon_max': 13.360},
+        'area_km2': 9.2,
+        'center': [52.460, 13.335],
+        'population': 105000,
+        'description': 'Residential, family area'
+    },
+    'Wilmersdorf': {
+        'bounds': {'lat_min': 52.470, 'lat_max': 52.510, 'lon_min': 13.280, 'lon_max': 13.330},
+        'area_km2': 8.9,
+        'center': [52.490, 13.305],
+        'population': 94000,
+        'description': 'Upscale residential'
+    },
+    'Spandau': {
+        'bounds': {'lat_min': 52.520, 'lat_max': 52.580, 'lon_min': 13.160, 'lon_max': 13.280},
+        'area_km2': 91.9,
+        'center': [52.550, 13.220],
+        'population': 245000,
+        'description': 'Historic town, outskirts'
+    }
+}
+
 def load_winery_data():
     """Load winery data."""
     try:
-        # Try both possible paths
-        try:
-            df = pd.read_csv('../data/berlin_wineries.csv')
-        except FileNotFoundError:
-            df = pd.read_csv('data/berlin_wineries.csv')
+        df = pd.read_csv(WINERY_CSV)
         print(f"Loaded {len(df)} wineries")
         return df
     except FileNotFoundError:
         print("Winery data not found. Please run the main analysis first.")
         return None
 
+def load_cached_districts():
+    """
+    Return the cached (wineries with districts, district stats) from the last run, or None.
+    The cache is only used while it is at least as new as both the winery CSV and this
+    script, which holds the district table.
+    """
+    try:
+        cache_mtime = DISTRICT_CACHE_FILE.stat().st_mtime
+        if cache_mtime < max(WINERY_CSV.stat().st_mtime, Path(__file__).stat().st_mtime):
+            return None
+        cached = pd.read_pickle(DISTRICT_CACHE_FILE)
+        return cached['wineries'], cached['district_stats']
+    except (OSError, EOFError, KeyError, pickle.UnpicklingError):
+        return None
+
+def save_cached_districts(df, district_stats_df):
+    """Cache the wineries with districts and the district stats for the next run."""
+    try:
+        pd.to_pickle({'wineries': df, 'district_stats': district_stats_df}, DISTRICT_CACHE_FILE)
+    except OSError as e:
+        print(f"Could not cache district assignment: {e}")
+
 def get_district_boundaries_and_areas():
-    """Define Berlin district boundaries and calculate their areas."""
-    
-    # Berlin district boundaries with more precise coordinates and area estimates
-    districts = {
-        'Mitte': {
-            'bounds': {'lat_min': 52.500, 'lat_max': 52.550, 'lon_min': 13.350, 'lon_max': 13.420},
-            'area_km2': 39.5,  # Official area in km²
-            'center': [52.525, 13.385],
-            'population': 383000,
-            'description': 'Historic center, government district'
-        },
-        'Prenzlauer Berg': {
-            'bounds': {'lat_min': 52.520, 'lat_max': 52.560, 'lon_min': 13.400, 'lon_max': 13.450},
-            'area_km2': 10.9,
-            'center': [52.540, 13.425],
-            'population': 165000,
-            'description': 'Trendy residential area'
-        },
-        'Charlottenburg': {
-            'bounds': {'lat_min': 52.490, 'lat_max': 52.530, 'lon_min': 13.280, 'lon_max': 13.350},
-            'area_km2': 64.7,
-            'center': [52.510, 13.315],
-            'population': 129000,
-            'description': 'Western district, shopping area'
-        },
-        'Kreuzberg': {
-            'bounds': {'lat_min': 52.490, 'lat_max': 52.520, 'lon_min': 13.380, 'lon_max': 13.420},
-            'area_km2': 15.2,
-            'center': [52.505, 13.400],
-            'population': 154000,
-            'description': 'Cultural hub, nightlife'
-        },
-        'Neukölln': {
-            'bounds': {'lat_min': 52.450, 'lat_max': 52.500, 'lon_min': 13.400, 'lon_max': 13.470},
-            'area_km2': 44.9,
-            'center': [52.475, 13.435],
-            'population': 329000,
-            'description': 'Diverse, gentrifying area'
-        },
-        'Friedrichshain': {
-            'bounds': {'lat_min': 52.500, 'lat_max': 52.530, 'lon_min': 13.420, 'lon_max': 13.480},
-            'area_km2': 9.8,
-            'center': [52.515, 13.450],
-            'population': 289000,
-            'description': 'Young, alternative scene'
-        },
-        'Schöneberg': {
-            'bounds': {'lat_min': 52.460, 'lat_max': 52.500, 'lon_min': 13.330, 'lon_max': 13.380},
-            'area_km2': 10.5,
-            'center': [52.480, 13.355],
-            'population': 349000,
-            'description': 'LGBTQ+ district, cafes'
-        },
-        'Wedding': {
-            'bounds': {'lat_min': 52.530, 'lat_max': 52.570, 'lon_min': 13.330, 'lon_max': 13.380},
-            'area_km2': 9.5,
-            'center': [52.550, 13.355],
-            'population': 87000,
-            'description': 'Up-and-coming area'
-        },
-        'Tempelhof': {
-            'bounds': {'lat_min': 52.450, 'lat_max': 52.490, 'lon_min': 13.380, 'lon_max': 13.420},
-            'area_km2': 12.2,
-            'center': [52.470, 13.400],
-            'population': 56000,
-            'description': 'Former airport area'
-        },
-        'Steglitz': {
-            'bounds': {'lat_min': 52.440, 'lat_max': 52.480, 'lon_min': 13.310, 'lon_max': 13.360},
-            'area_km2': 9.2,
-            'center': [52.460, 13.335],
-            'population': 105000,
-            'description': 'Residential, family area'
-        },
-        'Wilmersdorf': {
-            'bounds': {'lat_min': 52.470, 'lat_max': 52.510, 'lon_min': 13.280, 'lon_max': 13.330},
-            'area_km2': 8.9,
-            'center': [52.490, 13.305],
-            'population': 94000,
-            'description': 'Upscale residential'
-        },
-        'Spandau': {
-            'bounds': {'lat_min': 52.520, 'lat_max': 52.580, 'lon_min': 13.160, 'lon_max': 13.280},
-            'area_km2': 91.9,
-            'center': [52.550, 13.220],
-            'population': 245000,
-            'description': 'Historic town, outskirts'
-        }
-    }
-    
-    return districts
+    """Return the Berlin district boundaries, areas and populations."""
+    return DISTRICTS
+
+def locate_districts(lat, lon, lat_min, lat_max, lon_min, lon_max):
+    """
+    Return the index of the first district box containing each point, or -1 if none does.
+    The points are tested one district at a time, so only point-sized arrays are allocated
+    instead of a (points x districts) matrix. Districts are visited in reverse so the first
+    matching district is the one written last.
+    The test runs on float32 coordinates (sub-metre precision at Berlin's latitude), and the
+    indices come back as int8 since there are far fewer than 127 districts.
+    """
+    lat = np.asarray(lat, dtype=np.float32)
+    lon = np.asarray(lon, dtype=np.float32)
+    bounds = np.column_stack([lat_min, lat_max, lon_min, lon_max]).astype(np.float32)
+    
+    district_idx = np.full(len(lat), -1, dtype=np.int8)
+    for j in range(len(bounds) - 1, -1, -1):
+        d_lat_min, d_lat_max, d_lon_min, d_lon_max = bounds[j]
+        in_bounds = (lat >= d_lat_min) & (lat <= d_lat_max) & (lon >= d_lon_min) & (lon <= d_lon_max)
+        district_idx[in_bounds] = j
+    return district_idx
 
 def assign_districts_to_wineries(df, districts):
     """Assign each winery to its district and calculate district statistics."""
     
-    # Add district column
-    df['district'] = 'Other'
-    
-    for idx, winery in df.iterrows():
-        lat = winery.get('latitude')
-        lon = winery.get('longitude')
-        
-        if lat and lon:
-            for district_name, district_info in districts.items():
-                bounds = district_info['bounds']
-                if (bounds['lat_min'] <= lat <= bounds['lat_max'] and 
-                    bounds['lon_min'] <= lon <= bounds['lon_max']):
-                    df.loc[idx, 'district'] = district_name
-                    break
-    
-    # Calculate district statistics
-    district_stats = []
-    
-    for district_name, district_info in districts.items():
-        district_wineries = df[df['district'] == district_name]
-        winery_count = len(district_wineries)
-        area_km2 = district_info['area_km2']
-        density = winery_count / area_km2 if area_km2 > 0 else 0
-        
-        stats = {
-            'district': district_name,
-            'winery_count': winery_count,
-            'area_km2': area_km2,
-            'density_per_km2': round(density, 3),
-            'population': district_info['population'],
-            'wineries_per_100k_people': round((winery_count / district_info['population']) * 100000, 2) if district_info['population'] > 0 else 0,
-            'center': district_info['center'],
-            'description': district_info['description']
-        }
-        district_stats.append(stats)
-    
-    # Add "Other" areas (wineries not in defined districts)
-    other_wineries = df[df['district'] == 'Other']
-    if len(other_wineries) > 0:
+    # Lay the district bounds out as arrays, one entry per district
+    lat_min, lat_max, lon_min, lon_max = np.array([
+        [info['bounds']['lat_min'], info['bounds']['lat_max'], info['bounds']['lon_min'], info['bounds']['lon_max']]
+        for info in districts.values()
+    ]).T
+    district_idx = locate_districts(df['latitude'].to_numpy(), df['longitude'].to_numpy(),
+                                    lat_min, lat_max, lon_min, lon_max)
+
+    # Index -1 (no matching district) picks the trailing 'Other'
+    district_names = np.array(list(districts) + ['Other'])
+    df['district'] = district_names[district_idx]
+    
+    # One row per district, plus "Other" for the wineries not in defined districts
+    total_defined_area = sum(info['area_km2'] for info in districts.values())
+    berlin_total_area = 891.7  # Total Berlin area in km²
+    district_table = pd.DataFrame({
+        'district': list(districts) + ['Other'],
         # Estimate area for "Other" (remaining Berlin area)
-        total_defined_area = sum(d['area_km2'] for d in districts.values())
-        berlin_total_area = 891.7  # Total Berlin area in km²
-        other_area = berlin_total_area - total_defined_area
-        
-        other_stats = {
-            'district': 'Other',
-            'winery_count': len(other_wineries),
-            'area_km2': other_area,
-            'density_per_km2': round(len(other_wineries) / other_area, 3) if other_area > 0 else 0,
-            'population': 800000,  # Rough estimate for remaining areas
-            'wineries_per_100k_people': round((len(other_wineries) / 800000) * 100000, 2),
-            'center': [52.520, 13.405],  # Berlin center
-            'description': 'Other Berlin areas'
-        }
-        district_stats.append(other_stats)
-    
-    district_stats_df = pd.DataFrame(district_stats)
+        'area_km2': [info['area_km2'] for info in districts.values()] + [berlin_total_area - total_defined_area],
+        # Rough population estimate for the remaining areas
+        'population': [info['population'] for info in districts.values()] + [800000],
+        'center': [info['center'] for info in districts.values()] + [[52.520, 13.405]],  # Berlin center for "Other"
+        'description': [info['description'] for info in districts.values()] + ['Other Berlin areas']
+    })
+    
+    # Count the wineries per district in one pass and derive the metrics column-wise
+    counts = df.groupby('district').size().rename('winery_count')
+    district_stats_df = district_table.merge(counts, on='district', how='left').fillna({'winery_count': 0})
+    district_stats_df['winery_count'] = district_stats_df['winery_count'].astype(int)
+    district_stats_df['density_per_km2'] = (
+        (district_stats_df['winery_count'] / district_stats_df['area_km2'])
+        .where(district_stats_df['area_km2'] > 0, 0).round(3)
+    )
+    district_stats_df['wineries_per_100k_people'] = (
+        (district_stats_df['winery_count'] / district_stats_df['population'] * 100000)
+        .where(district_stats_df['population'] > 0, 0).round(2)
+    )
+    # Balance of density and accessibility, used to rank the most efficient districts
+    district_stats_df['efficiency_score'] = (
+        district_stats_df['density_per_km2'] * 0.6 + 
+        district_stats_df['wineries_per_100k_people'] * 0.004  # Scale to similar range
+    )
+    
+    # "Other" is only reported when some wineries fall outside the defined districts
+    district_stats_df = district_stats_df[
+        (district_stats_df['district'] != 'Other') | (district_stats_df['winery_count'] > 0)
+    ][['district', 'winery_count', 'area_km2', 'density_per_km2', 'population',
+       'wineries_per_100k_people', 'center', 'description', 'efficiency_score']]
+    
     district_stats_df = district_stats_df.sort_values('density_per_km2', ascending=False)
     
     return df, district_stats_df
@@ -187,22 +231,13 @@ def assign_districts_to_wineries(df, districts):
 def create_density_interactive_map(df, district_stats_df, districts):
     """Create an interactive map showing winery density by district."""
     
-    berlin_center = [52.520008, 13.404954]
-    
-    # Create base map
-    m = folium.Map(
-        location=berlin_center,
-        zoom_start=11,
-        tiles='cartodbpositron'
+    # Create base map with title
+    m = create_berlin_base_map(
+        title="Berlin Winery Density Map",
+        subtitle="Wineries per Square Kilometer by District",
+        prefer_canvas=True
     )
     
-    # Add title
-    title_html = '''
-    <h3 align="center" style="font-size:20px"><b>Berlin Winery Density Map</b></h3>
-    <p align="center" style="font-size:14px">Wineries per Square Kilometer by District</p>
-    '''
-    m.get_root().html.add_child(folium.Element(title_html))
-    
     # Color scheme based on density
     max_density = district_stats_df['density_per_km2'].max()
     
@@ -220,98 +255,120 @@ def create_density_interactive_map(df, district_stats_df, districts):
         else:
             return '#7f1d1d'  # Dark red
     
-    # Add district rectangles/circles with density information
-    for idx, district_data in district_stats_df.iterrows():
-        district_name = district_data['district']
-        density = district_data['density_per_km2']
-        winery_count = district_data['winery_count']
-        area = district_data['area_km2']
-        
-        if district_name in districts:
-            center = districts[district_name]['center']
-            bounds = districts[district_name]['bounds']
-            
-            # Create rectangle for district
-            rectangle_coords = [
-                [bounds['lat_min'], bounds['lon_min']],
-                [bounds['lat_min'], bounds['lon_max']],
-                [bounds['lat_max'], bounds['lon_max']],
-                [bounds['lat_max'], bounds['lon_min']],
-                [bounds['lat_min'], bounds['lon_min']]
-            ]
-            
-            color = get_density_color(density)
-            
-            popup_text = f"""
-            <b>{district_name}</b><br>
-            <strong>Density: {density} wineries/km²</strong><br>
-            Wineries: {winery_count}<br>
-            Area: {area} km²<br>
-            Population: {district_data['population']:,}<br>
-            Wineries per 100k people: {district_data['wineries_per_100k_people']}<br>
-            <em>{district_data['description']}</em>
-            """
-            
-            folium.Polygon(
-                locations=rectangle_coords,
-                popup=folium.Popup(popup_text, max_width=300),
-                tooltip=f"{district_name}: {density} wineries/km²",
-                color='white',
-                weight=2,
-                fillColor=color,
-                fillOpacity=0.7
-            ).add_to(m)
-            
-            # Add density label in center
-            folium.Marker(
-                location=center,
-                popup=folium.Popup(popup_text, max_width=300),
-                tooltip=f"{district_name}: {density}/km²",
-                icon=folium.DivIcon(
-                    html=f'<div style="text-align: center; font-weight: bold; font-size: 14px; color: black; background: white; border: 2px solid black; border-radius: 5px; padding: 2px;">{density}</div>',
-                    icon_size=(60, 20),
-                    icon_anchor=(30, 10)
-                )
-            ).add_to(m)
-    
-    # Add individual winery markers
-    for idx, winery in df.iterrows():
-        lat = winery['latitude']
-        lon = winery['longitude']
-        name = winery['name']
-        district = winery['district']
-        
-        popup_text = f"""
-        <b>{name}</b><br>
-        District: {district}<br>
-        """
+    # Add district rectangles/circles with density information; 'Other' has no
+    # bounds to draw. The popup text is built for all districts in one pass
+    drawn_stats = district_stats_df[district_stats_df['district'].isin(list(districts))]
+    popup_texts = (
+        "\n            <b>" + drawn_stats['district'] + "</b><br>\n"
+        "            <strong>Density: " + drawn_stats['density_per_km2'].astype(str) + " wineries/km²</strong><br>\n"
+        "            Wineries: " + drawn_stats['winery_count'].astype(str) + "<br>\n"
+        "            Area: " + drawn_stats['area_km2'].astype(str) + " km²<br>\n"
+        "            Population: " + drawn_stats['population'].map('{:,}'.format) + "<br>\n"
+        "            Wineries per 100k people: " + drawn_stats['wineries_per_100k_people'].astype(str) + "<br>\n"
+        "            <em>" + drawn_stats['description'] + "</em>\n            "
+    )
+    
+    # Draw every district rectangle as one feature of a single GeoJSON layer
+    district_features = []
+    for district_name, density, popup_text in zip(drawn_stats['district'], drawn_stats['density_per_km2'], popup_texts):
+        bounds = districts[district_name]['bounds']
         
-        # Color code by district density
-        district_data = district_stats_df[district_stats_df['district'] == district]
-        if len(district_data) > 0:
-            density = district_data.iloc[0]['density_per_km2']
-            if density >= 2.0:
-                marker_color = 'red'
-            elif density >= 1.0:
-                marker_color = 'orange'
-            elif density >= 0.5:
-                marker_color = 'green'
-            else:
-                marker_color = 'blue'
-        else:
-            marker_color = 'gray'
+        # GeoJSON rings are closed and list positions as [lon, lat]
+        rectangle_coords = [
+            [bounds['lon_min'], bounds['lat_min']],
+            [bounds['lon_max'], bounds['lat_min']],
+            [bounds['lon_max'], bounds['lat_max']],
+            [bounds['lon_min'], bounds['lat_max']],
+            [bounds['lon_min'], bounds['lat_min']]
+        ]
         
-        folium.CircleMarker(
-            location=[lat, lon],
-            radius=4,
-            popup=folium.Popup(popup_text, max_width=200),
-            tooltip=name,
-            color='white',
-            weight=1,
-            fillColor=marker_color,
-            fillOpacity=0.8
+        district_features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Polygon', 'coordinates': [rectangle_coords]},
+            'properties': {
+                'name': district_name,
+                'density': density,
+                'tooltip': f"{district_name}: {density} wineries/km²",
+                'popup_html': popup_text
+            }
+        })
+    
+    folium.GeoJson(
+        {'type': 'FeatureCollection', 'features': district_features},
+        name='District Density',
+        style_function=lambda feature: {
+            'fillColor': get_density_color(feature['properties']['density']),
+            'color': 'white',
+            'weight': 2,
+            'fillOpacity': 0.7
+        },
+        tooltip=folium.GeoJsonTooltip(fields=['tooltip'], labels=False),
+        popup=folium.GeoJsonPopup(fields=['popup_html'], labels=False, max_width=300)
+    ).add_to(m)
+    
+    # Add density label in each district center
+    for district_name, density, popup_text in zip(drawn_stats['district'], drawn_stats['density_per_km2'], popup_texts):
+        folium.Marker(
+            location=districts[district_name]['center'],
+            popup=folium.Popup(popup_text, max_width=300),
+            tooltip=f"{district_name}: {density}/km²",
+            icon=folium.DivIcon(
+                html=f'<div style="text-align: center; font-weight: bold; font-size: 14px; color: black; background: white; border: 2px solid black; border-radius: 5px; padding: 2px;">{density}</div>',
+                icon_size=(60, 20),
+                icon_anchor=(30, 10)
+            )
         ).add_to(m)
     
+    # Color code each winery by its district's density, looked up once per district
+    density = df['district'].map(dict(zip(district_stats_df['district'], district_stats_df['density_per_km2'])))
+    marker_colors = np.select(
+        [density.isna(), density >= 2.0, density >= 1.0, density >= 0.5],
+        ['gray', 'red', 'orange', 'green'],
+        default='blue'
+    )
+    
+    popup_texts = (
+        "\n        <b>" + df['name'].astype(str) + "</b><br>\n"
+        "        District: " + df['district'] + "<br>\n        "
+    )
+    
+    # Show where the wineries concentrate as a heatmap layer
+    HeatMap(
+        df[['latitude', 'longitude']].to_numpy().tolist(),
+        name='Winery Heatmap',
+        radius=12,
+        blur=18,
+        min_opacity=0.3
+    ).add_to(m)
+    
+    # Keep the individual winery markers as one clustered layer, hidden until toggled
+    # on; the browser builds each circle marker from its data row instead of folium
+    # rendering one object per winery
+    marker_callback = """
+    function (row) {
+        var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+            radius: 4, color: 'white', weight: 1, fillColor: row[4], fillOpacity: 0.8
+        });
+        marker.bindPopup(row[2], {maxWidth: 200});
+        marker.bindTooltip(row[3]);
+        return marker;
+    };
+    """
+    FastMarkerCluster(
+        pd.DataFrame({
+            'latitude': df['latitude'],
+            'longitude': df['longitude'],
+            'popup': popup_texts,
+            'name': df['name'].astype(str),
+            'marker_color': marker_colors,
+        }).values.tolist(),
+        callback=marker_callback,
+        name='Wineries',
+        show=False
+    ).add_to(m)
+    
+    folium.LayerControl().add_to(m)
+    
     # Add legend
     legend_html = '''
     <div style="position: fixed; 
@@ -332,12 +389,8 @@ def create_density_interactive_map(df, district_stats_df, districts):
     m.get_root().html.add_child(folium.Element(legend_html))
     
     # Save map
-    try:
-        output_file = '../outputs/berlin_winery_density_map.html'
-        m.save(output_file)
-    except FileNotFoundError:
-        output_file = 'outputs/berlin_winery_density_map.html'
-        m.save(output_file)
+    output_file = OUTPUTS_DIR / 'berlin_winery_density_map.html'
+    m.save(output_file)
     
     print(f"Winery density map saved as {output_file}")
     return output_file
@@ -346,7 +399,7 @@ def create_density_analysis_charts(district_stats_df):
     """Create charts analyzing winery density across districts."""
     
     plt.style.use('default')
-    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12), layout='constrained')
     
     # Chart 1: Density by district
     top_districts = district_stats_df.head(10)
@@ -367,7 +420,7 @@ def create_density_analysis_charts(district_stats_df):
     
     # Chart 2: Count vs Area scatter
     ax2.scatter(district_stats_df['area_km2'], district_stats_df['winery_count'], 
-               s=district_stats_df['density_per_km2']*100, alpha=0.6, c='orange')
+               s=district_stats_df['density_per_km2']*100, alpha=0.6, c='orange', rasterized=True)
     ax2.set_xlabel('District Area (km²)')
     ax2.set_ylabel('Number of Wineries')
     ax2.set_title('Winery Count vs District Area\n(Bubble size = density)')
@@ -397,7 +450,7 @@ def create_density_analysis_charts(district_stats_df):
     
     # Chart 4: Efficiency comparison (density vs accessibility)
     ax4.scatter(district_stats_df['density_per_km2'], district_stats_df['wineries_per_100k_people'],
-               s=district_stats_df['winery_count']*20, alpha=0.6, c='purple')
+               s=district_stats_df['winery_count']*20, alpha=0.6, c='purple', rasterized=True)
     ax4.set_xlabel('Density (wineries/km²)')
     ax4.set_ylabel('Accessibility (wineries/100k people)')
     ax4.set_title('District Efficiency: Density vs Accessibility\n(Bubble size = total wineries)')
@@ -410,15 +463,9 @@ def create_density_analysis_charts(district_stats_df):
                         xytext=(5, 5), textcoords='offset points',
                         fontsize=8, alpha=0.8)
     
-    plt.tight_layout()
-    
-    # Save chart
-    try:
-        output_file = '../outputs/berlin_winery_density_analysis.png'
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-    except FileNotFoundError:
-        output_file = 'outputs/berlin_winery_density_analysis.png'
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    # Save chart; the layout is solved by the constrained layout engine while drawing
+    output_file = OUTPUTS_DIR / 'berlin_winery_density_analysis.png'
+    plt.savefig(output_file, dpi=150, bbox_inches='tight')
     
     plt.close()
     print(f"Density analysis charts saved as {output_file}")
@@ -427,7 +474,7 @@ def create_density_analysis_charts(district_stats_df):
 def generate_density_report(district_stats_df):
     """Generate a detailed density analysis report."""
     
-    report = f"""
+    report_parts = [f"""
 # Berlin Winery Density Analysis Report
 
 ## Executive Summary
@@ -436,27 +483,34 @@ This analysis examines winery density across Berlin districts, accounting for bo
 ## Key Metrics
 
 ### Top Districts by Winery Density (wineries/km²):
-"""
+"""]
+    
+    # The stats are sorted by density (descending), so every density band is a
+    # contiguous slice found by binary search on the reversed density column
+    ascending_density = district_stats_df['density_per_km2'].to_numpy()[::-1]
     
-    top_5_density = district_stats_df.head(5)
+    def count_at_least(threshold):
+        return len(ascending_density) - np.searchsorted(ascending_density, threshold, side='left')
+    
+    top_5_density = district_stats_df.iloc[:5]
     for i, (idx, district) in enumerate(top_5_density.iterrows(), 1):
-        report += f"""
+        report_parts.append(f"""
 {i}. **{district['district']}**
    - Density: {district['density_per_km2']} wineries/km²
    - Total wineries: {district['winery_count']}
    - Area: {district['area_km2']} km²
    - Accessibility: {district['wineries_per_100k_people']} wineries per 100k people
    - {district['description']}
-"""
+""")
     
     # Calculate summary statistics
     total_wineries = district_stats_df['winery_count'].sum()
     total_area = district_stats_df['area_km2'].sum()
     avg_density = total_wineries / total_area
     
-    high_density_districts = len(district_stats_df[district_stats_df['density_per_km2'] >= 1.0])
+    high_density_districts = count_at_least(1.0)
     
-    report += f"""
+    report_parts.append(f"""
 ## Overall Statistics
 - **Total wineries analyzed**: {total_wineries}
 - **Total area covered**: {total_area:.1f} km²
@@ -466,49 +520,41 @@ This analysis examines winery density across Berlin districts, accounting for bo
 ## District Categories
 
 ### High Density (≥2.0 wineries/km²):
-"""
+""")
     
-    high_density = district_stats_df[district_stats_df['density_per_km2'] >= 2.0]
+    high_density = district_stats_df.iloc[:count_at_least(2.0)]
     if len(high_density) > 0:
         for idx, district in high_density.iterrows():
-            report += f"- **{district['district']}**: {district['density_per_km2']} wineries/km² ({district['winery_count']} wineries in {district['area_km2']} km²)\n"
+            report_parts.append(f"- **{district['district']}**: {district['density_per_km2']} wineries/km² ({district['winery_count']} wineries in {district['area_km2']} km²)\n")
     else:
-        report += "- No districts with density ≥2.0 wineries/km²\n"
+        report_parts.append("- No districts with density ≥2.0 wineries/km²\n")
     
-    report += "\n### Medium Density (1.0-2.0 wineries/km²):\n"
-    medium_density = district_stats_df[
-        (district_stats_df['density_per_km2'] >= 1.0) & 
-        (district_stats_df['density_per_km2'] < 2.0)
-    ]
+    report_parts.append("\n### Medium Density (1.0-2.0 wineries/km²):\n")
+    medium_density = district_stats_df.iloc[count_at_least(2.0):count_at_least(1.0)]
     if len(medium_density) > 0:
         for idx, district in medium_density.iterrows():
-            report += f"- **{district['district']}**: {district['density_per_km2']} wineries/km² ({district['winery_count']} wineries in {district['area_km2']} km²)\n"
+            report_parts.append(f"- **{district['district']}**: {district['density_per_km2']} wineries/km² ({district['winery_count']} wineries in {district['area_km2']} km²)\n")
     else:
-        report += "- No districts with medium density\n"
+        report_parts.append("- No districts with medium density\n")
     
     # Find most efficient districts (good balance of density and accessibility)
-    district_stats_df['efficiency_score'] = (
-        district_stats_df['density_per_km2'] * 0.6 + 
-        district_stats_df['wineries_per_100k_people'] * 0.004  # Scale to similar range
-    )
-    
     top_efficient = district_stats_df.nlargest(3, 'efficiency_score')
     
-    report += f"""
+    report_parts.append(f"""
 ## Strategic Insights
 
 ### Most Efficient Districts (density + accessibility):
-"""
+""")
     
     for i, (idx, district) in enumerate(top_efficient.iterrows(), 1):
-        report += f"""
+        report_parts.append(f"""
 {i}. **{district['district']}**
    - Efficiency score: {district['efficiency_score']:.2f}
    - Density: {district['density_per_km2']}/km²
    - Accessibility: {district['wineries_per_100k_people']}/100k people
-"""
+""")
     
-    report += f"""
+    report_parts.append(f"""
 ### Recommendations:
 - **High opportunity areas**: Districts with low density but high population
 - **Saturation concern**: Districts with very high density may be oversaturated
@@ -519,17 +565,14 @@ This analysis examines winery density across Berlin districts, accounting for bo
 - Density calculations based on official district areas
 - Population data used for accessibility metrics
 - "Other" category includes peripheral Berlin areas
-"""
+""")
+    
+    report = ''.join(report_parts)
     
     # Save report
-    try:
-        output_file = '../outputs/berlin_winery_density_report.md'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(report)
-    except FileNotFoundError:
-        output_file = 'outputs/berlin_winery_density_report.md'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(report)
+    output_file = OUTPUTS_DIR / 'berlin_winery_density_report.md'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(report)
     
     print(f"Density analysis report saved as {output_file}")
     return output_file
@@ -577,16 +620,25 @@ def main():
     print("🍷 Berlin Winery Density Analyzer")
     print("=" * 50)
     
-    # Load data
-    df = load_winery_data()
-    if df is None:
-        return
-    
     # Get district information
     districts = get_district_boundaries_and_areas()
     
-    # Assign districts and calculate stats
-    df_with_districts, district_stats_df = assign_districts_to_wineries(df, districts)
+    # Reuse the district assignment and stats while the winery data is unchanged
+    cached = load_cached_districts()
+    if cached is not None:
+        df_with_districts, district_stats_df = cached
+        print(f"Loaded {len(df_with_districts)} wineries with districts from {DISTRICT_CACHE_FILE.name}")
+    else:
+        # Load data
+        df = load_winery_data()
+        if df is None:
+            return
+        
+        # Assign districts and calculate stats
+        df_with_districts, district_stats_df = assign_districts_to_wineries(df, districts)
+        save_cached_districts(df_with_districts, district_stats_df)
+    
+    OUTPUTS_DIR.mkdir(exist_ok=True)
     
     # Analyze patterns
     analyze_density_patterns(district_stats_df)
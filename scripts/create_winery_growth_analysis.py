@@ -14,6 +14,8 @@ import seaborn as sns
 from datetime import datetime, timedelta
 import random
 
+from map_utils import create_berlin_base_map
+
 def load_current_winery_data():
     """Load current winery data and density analysis."""
     try:
@@ -388,22 +390,12 @@ def calculate_growth_metrics(historical_df):
 def create_growth_map(growth_metrics_df, districts_info):
     """Create an interactive map showing average annual growth rates."""
     
-    berlin_center = [52.520008, 13.404954]
-    
-    # Create base map
-    m = folium.Map(
-        location=berlin_center,
-        zoom_start=11,
-        tiles='cartodbpositron'
+    # Create base map with title
+    m = create_berlin_base_map(
+        title="Berlin Winery Density Growth (2014-2024)",
+        subtitle="Average Annual Growth Rate by District"
     )
     
-    # Add title
-    title_html = '''
-    <h3 align="center" style="font-size:20px"><b>Berlin Winery Density Growth (2014-2024)</b></h3>
-    <p align="center" style="font-size:14px">Average Annual Growth Rate by District</p>
-    '''
-    m.get_root().html.add_child(folium.Element(title_html))
-    
     # Color scheme based on growth rate
     max_growth = growth_metrics_df['cagr'].max()
     min_growth = growth_metrics_df['cagr'].min()
@@ -3,7 +3,7 @@
 Create a heatmap of Berlin wineries on a map and save as PNG
 """
 
-import pandas as pd
+import csv
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.colors import LinearSegmentedColormap
@@ -17,28 +17,36 @@ from scipy import ndimage
 plt.style.use('default')
 sns.set_palette("viridis")
 
+def load_winery_coordinates(filename='../data/berlin_wineries.csv'):
+    """Stream only the latitude/longitude columns from the CSV, skipping rows without coordinates."""
+    with open(filename, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        lat_idx, lon_idx = header.index('latitude'), header.index('longitude')
+        coords = np.array(
+            [(float(row[lat_idx]), float(row[lon_idx]))
+             for row in reader if row[lat_idx] and row[lon_idx]],
+            dtype=float
+        ).reshape(-1, 2)
+    return coords[:, 0], coords[:, 1]
+
 def create_winery_heatmap():
     """Create a heatmap of Berlin wineries and save as PNG."""
     
     # Load the winery data
     print("Loading winery data...")
-    df = pd.read_csv('../data/berlin_wineries.csv')
-    
-    # Remove rows with missing coordinates
-    df_clean = df.dropna(subset=['latitude', 'longitude'])
-    print(f"Found {len(df_clean)} wineries with valid coordinates")
+    lat, lon = load_winery_coordinates()
+    print(f"Found {len(lat)} wineries with valid coordinates")
     
     # Berlin boundaries (approximate)
     lat_min, lat_max = 52.3, 52.7
     lon_min, lon_max = 13.0, 13.8
     
     # Filter data to Berlin area
-    df_berlin = df_clean[
-        (df_clean['latitude'] >= lat_min) & (df_clean['latitude'] <= lat_max) &
-        (df_clean['longitude'] >= lon_min) & (df_clean['longitude'] <= lon_max)
-    ]
+    in_berlin = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+    lat, lon = lat[in_berlin], lon[in_berlin]
     
-    print(f"Filtered to {len(df_berlin)} wineries within Berlin boundaries")
+    print(f"Filtered to {len(lat)} wineries within Berlin boundaries")
     
     # Create a high-resolution figure
     fig, ax = plt.subplots(figsize=(16, 12), dpi=300)
@@ -49,15 +57,17 @@ def create_winery_heatmap():
     
     # Create the 2D histogram
     hist, xedges, yedges = np.histogram2d(
-        df_berlin['longitude'], 
-        df_berlin['latitude'], 
+        lon, 
+        lat, 
         bins=bins,
         range=[[lon_min, lon_max], [lat_min, lat_max]]
     )
     
-    # Apply Gaussian smoothing for better visualization
-    from scipy import ndimage
-    hist_smooth = ndimage.gaussian_filter(hist, sigma=1.0)
+    # Apply Gaussian smoothing for better visualization, as two separable 1D
+    # passes over a float32 grid
+    hist_smooth = hist.astype(np.float32)
+    for axis in (0, 1):
+        hist_smooth = ndimage.gaussian_filter1d(hist_smooth, sigma=1.0, axis=axis, truncate=3.0)
     
     # Create the heatmap
     extent = [lon_min, lon_max, lat_min, lat_max]
@@ -82,8 +92,8 @@ def create_winery_heatmap():
     
     # Overlay the actual winery locations as points
     scatter = ax.scatter(
-        df_berlin['longitude'], 
-        df_berlin['latitude'], 
+        lon, 
+        lat, 
         c='white', 
         s=15, 
         alpha=0.9, 
@@ -116,10 +126,10 @@ def create_winery_heatmap():
         'Potsdamer Platz': (13.3759, 52.5096)
     }
     
-    for name, (lon, lat) in landmarks.items():
-        ax.plot(lon, lat, marker='*', color='gold', markersize=12, 
+    for name, (landmark_lon, landmark_lat) in landmarks.items():
+        ax.plot(landmark_lon, landmark_lat, marker='*', color='gold', markersize=12, 
                 markeredgecolor='black', markeredgewidth=1)
-        ax.annotate(name, (lon, lat), xytext=(5, 5), 
+        ax.annotate(name, (landmark_lon, landmark_lat), xytext=(5, 5), 
                    textcoords='offset points', fontsize=10, 
                    bbox=dict(boxstyle='round,pad=0.3', facecolor='yellow', alpha=0.7))
     
@@ -138,9 +148,9 @@ def create_winery_heatmap():
     
     # Also create a summary
     print(f"\nSummary:")
-    print(f"- Total wineries plotted: {len(df_berlin)}")
-    print(f"- Latitude range: {df_berlin['latitude'].min():.4f} to {df_berlin['latitude'].max():.4f}")
-    print(f"- Longitude range: {df_berlin['longitude'].min():.4f} to {df_berlin['longitude'].max():.4f}")
+    print(f"- Total wineries plotted: {len(lat)}")
+    print(f"- Latitude range: {lat.min():.4f} to {lat.max():.4f}")
+    print(f"- Longitude range: {lon.min():.4f} to {lon.max():.4f}")
     
     # Show the plot (won't display in headless mode, but good for debugging)
     # plt.show()
@@ -149,6 +159,10 @@ def create_winery_heatmap():
     
     return output_filename
 
-if __name__ == "__main__":
+def main():
+    """Main function to create the basic winery heatmap."""
     output_file = create_winery_heatmap()
-    print(f"Successfully created heatmap: {output_file}")
\ No newline at end of file
+    print(f"Successfully created heatmap: {output_file}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -3,6 +3,7 @@
 Create an improved heatmap of Berlin wineries with actual Berlin map background
 """
 
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
@@ -23,8 +24,32 @@ def download_berlin_map_data():
     # For now, we'll create a more comprehensive visualization with better landmarks
     pass
 
-def create_improved_winery_heatmap():
-    """Create an improved heatmap of Berlin wineries with proper geographical context."""
+def bin_and_blur(lon, lat, lon_range, lat_range, bins, sigma):
+    """
+    Bin points onto a regular grid and smooth it with a Gaussian blur.
+    The blur is applied as a truncated 1D Gaussian along each axis in turn (reflected
+    borders), which gives the same result as a 2D gaussian_filter in O(bins^2 * radius).
+    """
+    (lon_min, lon_max), (lat_min, lat_max) = lon_range, lat_range
+    inside = (lon >= lon_min) & (lon <= lon_max) & (lat >= lat_min) & (lat <= lat_max)
+    lon, lat = lon[inside], lat[inside]
+    
+    # Points on the upper edge belong to the last bin, as with np.histogram2d
+    x = np.minimum(((lon - lon_min) / (lon_max - lon_min) * bins).astype(np.intp), bins - 1)
+    y = np.minimum(((lat - lat_min) / (lat_max - lat_min) * bins).astype(np.intp), bins - 1)
+    hist = np.bincount(x * bins + y, minlength=bins * bins).reshape(bins, bins).astype(float)
+    
+    for axis in (0, 1):
+        hist = ndimage.gaussian_filter1d(hist, sigma=sigma, axis=axis)
+    return hist
+
+def create_improved_winery_heatmap(preview=False):
+    """Create an improved heatmap of Berlin wineries with proper geographical context.
+    
+    With preview=True the figure is rendered at 100 dpi with nearest-neighbour
+    interpolation for fast iteration; final output uses 300 dpi.
+    """
+    dpi = 100 if preview else 300
     
     # Load the winery data
     print("Loading winery data...")
@@ -47,7 +72,7 @@ def create_improved_winery_heatmap():
     print(f"Filtered to {len(df_berlin)} wineries within Berlin boundaries")
     
     # Create a high-resolution figure with better aspect ratio
-    fig, ax = plt.subplots(figsize=(20, 16), dpi=300)
+    fig, ax = plt.subplots(figsize=(20, 16), dpi=dpi)
     
     # Set white background for better contrast
     fig.patch.set_facecolor('white')
@@ -56,18 +81,16 @@ def create_improved_winery_heatmap():
     # Create a 2D histogram (heatmap) of winery locations with higher resolution
     bins = 75  # Increased resolution
     
-    # Create the 2D histogram
-    hist, xedges, yedges = np.histogram2d(
-        df_berlin['longitude'], 
-        df_berlin['latitude'], 
+    # Create the 2D histogram and apply Gaussian smoothing for better visualization
+    hist_smooth = bin_and_blur(
+        df_berlin['longitude'].to_numpy(), 
+        df_berlin['latitude'].to_numpy(), 
+        lon_range=(lon_min, lon_max),
+        lat_range=(lat_min, lat_max),
         bins=bins,
-        range=[[lon_min, lon_max], [lat_min, lat_max]]
+        sigma=1.5
     )
     
-    # Apply Gaussian smoothing for better visualization
-    from scipy import ndimage
-    hist_smooth = ndimage.gaussian_filter(hist, sigma=1.5)
-    
     # Create the extent for the heatmap
     extent = [lon_min, lon_max, lat_min, lat_max]
     
@@ -84,7 +107,7 @@ def create_improved_winery_heatmap():
         origin='lower', 
         cmap=cmap, 
         alpha=0.7,
-        interpolation='bilinear',
+        interpolation='nearest' if preview else 'bilinear',
         aspect='auto'
     )
     
@@ -126,7 +149,8 @@ def create_improved_winery_heatmap():
         edgecolors='white', 
         linewidth=0.8,
         label='Wineries',
-        zorder=5
+        zorder=5,
+        rasterized=True
     )
     
     # Add landmarks with better styling
@@ -204,7 +228,7 @@ def create_improved_winery_heatmap():
     
     # Save as high-quality PNG
     output_filename = '../outputs/berlin_wineries_heatmap_improved.png'
-    plt.savefig(output_filename, dpi=300, bbox_inches='tight', 
+    plt.savefig(output_filename, dpi=dpi, bbox_inches='tight', 
                 facecolor='white', edgecolor='none', pad_inches=0.2)
     
     print(f"Improved heatmap saved as '{output_filename}'")
@@ -218,12 +242,16 @@ def create_improved_winery_heatmap():
     print(f"- Most common districts by winery count:")
     
     # Simple district analysis based on coordinates
-    df_berlin['district_approx'] = df_berlin.apply(lambda row: 
-        'Mitte' if 13.35 <= row['longitude'] <= 13.45 and 52.50 <= row['latitude'] <= 52.54
-        else 'Charlottenburg' if 13.25 <= row['longitude'] <= 13.35 and 52.48 <= row['latitude'] <= 52.54
-        else 'Kreuzberg' if 13.38 <= row['longitude'] <= 13.43 and 52.48 <= row['latitude'] <= 52.52
-        else 'Prenzlauer Berg' if 13.38 <= row['longitude'] <= 13.44 and 52.53 <= row['latitude'] <= 52.57
-        else 'Other', axis=1)
+    lat = df_berlin['latitude'].to_numpy()
+    lon = df_berlin['longitude'].to_numpy()
+    district_conditions = [
+        (lon >= 13.35) & (lon <= 13.45) & (lat >= 52.50) & (lat <= 52.54),
+        (lon >= 13.25) & (lon <= 13.35) & (lat >= 52.48) & (lat <= 52.54),
+        (lon >= 13.38) & (lon <= 13.43) & (lat >= 52.48) & (lat <= 52.52),
+        (lon >= 13.38) & (lon <= 13.44) & (lat >= 52.53) & (lat <= 52.57),
+    ]
+    district_choices = ['Mitte', 'Charlottenburg', 'Kreuzberg', 'Prenzlauer Berg']
+    df_berlin['district_approx'] = np.select(district_conditions, district_choices, default='Other')
     
     district_counts = df_berlin['district_approx'].value_counts()
     for district, count in district_counts.head(5).items():
@@ -233,6 +261,15 @@ def create_improved_winery_heatmap():
     
     return output_filename
 
+def main():
+    """Main function to create the improved winery heatmap."""
+    parser = argparse.ArgumentParser(description="Create an improved Berlin winery heatmap")
+    parser.add_argument("--preview", action="store_true",
+                        help="Render a quick low-resolution preview instead of the final 300 dpi image")
+    args = parser.parse_args()
+    
+    output_file = create_improved_winery_heatmap(preview=args.preview)
+    print(f"Successfully created improved heatmap: {output_file}")
+
 if __name__ == "__main__":
-    output_file = create_improved_winery_heatmap()
-    print(f"Successfully created improved heatmap: {output_file}")
\ No newline at end of file
+    main()
@@ -15,6 +15,8 @@ from datetime import datetime, timedelta
 import random
 from scipy.stats import pearsonr
 
+from map_utils import create_berlin_base_map
+
 def get_real_estate_data():
     """
     Generate realistic real estate price increase data for Berlin districts (2014-2024).
@@ -217,22 +219,12 @@ def calculate_correlations(correlation_df):
 def create_dual_overlay_map(correlation_df):
     """Create an interactive map overlaying winery growth and real estate appreciation."""
     
-    berlin_center = [52.520008, 13.404954]
-    
-    # Create base map
-    m = folium.Map(
-        location=berlin_center,
-        zoom_start=11,
-        tiles='cartodbpositron'
+    # Create base map with title
+    m = create_berlin_base_map(
+        title="Berlin: Winery Growth vs Real Estate Appreciation (2014-2024)",
+        subtitle="Correlation Analysis of Market Development"
     )
     
-    # Add title
-    title_html = '''
-    <h3 align="center" style="font-size:20px"><b>Berlin: Winery Growth vs Real Estate Appreciation (2014-2024)</b></h3>
-    <p align="center" style="font-size:14px">Correlation Analysis of Market Development</p>
-    '''
-    m.get_root().html.add_child(folium.Element(title_html))
-    
     # Get district boundaries
     districts_info = get_district_boundaries_and_areas()
     
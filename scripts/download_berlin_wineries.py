@@ -4,27 +4,21 @@ Script to download the locations of all wineries in Berlin using OpenStreetMap d
 Uses the Overpass API to query for wineries and wine shops in Berlin.
 """
 
+import argparse
 import requests
-import json
-import csv
-import time
+import orjson
+from collections import Counter
 from typing import List, Dict, Any
 
-def get_berlin_wineries() -> List[Dict[str, Any]]:
-    """
-    Query Overpass API for wineries and wine-related businesses in Berlin.
-    Returns a list of dictionaries containing location data.
-    """
-    # Overpass API endpoint
-    overpass_url = "http://overpass-api.de/api/interpreter"
-    
-    # Overpass QL query for wineries and wine shops in Berlin
-    # This searches for:
-    # - Amenities tagged as "bar" with wine specialization
-    # - Shops tagged as "wine" 
-    # - Any amenity tagged as "winery"
-    # - Craft businesses that are wineries
-    overpass_query = """
+from overpass_utils import OVERPASS_URL, fetch_overpass_cached, iter_records, parse_elements, write_csv, write_json
+
+# Overpass QL query for wineries and wine shops in Berlin
+# This searches for:
+# - Amenities tagged as "bar" with wine specialization
+# - Shops tagged as "wine" 
+# - Any amenity tagged as "winery"
+# - Craft businesses that are wineries
+BERLIN_WINERIES_QUERY = """
     [out:json][timeout:25];
     (
       area["name"="Berlin"]["admin_level"="4"];
@@ -45,143 +39,96 @@ def get_berlin_wineries() -> List[Dict[str, Any]]:
     );
     out center meta;
     """
-    
+
+# Where --raw stores the unparsed Overpass response
+RAW_JSON_FILE = "../data/berlin_wineries_overpass.json"
+
+# Winery columns taken from OSM tags, as (column, tag, default)
+WINERY_SCHEMA = (
+    ('name', 'name', 'Unknown'),
+    ('amenity', 'amenity', ''),
+    ('shop', 'shop', ''),
+    ('craft', 'craft', ''),
+    ('street', 'addr:street', ''),
+    ('housenumber', 'addr:housenumber', ''),
+    ('postcode', 'addr:postcode', ''),
+    ('city', 'addr:city', ''),
+    ('phone', 'phone', ''),
+    ('website', 'website', ''),
+    ('email', 'email', ''),
+    ('opening_hours', 'opening_hours', ''),
+    ('description', 'description', ''),
+    ('wine_types', 'drink:wine', ''),
+)
+
+def get_berlin_wineries(include_raw_tags: bool = False) -> Dict[str, List[Any]]:
+    """
+    Query Overpass API for wineries and wine-related businesses in Berlin.
+    Returns the location data as parallel column lists (id, type, coordinates and WINERY_SCHEMA).
+    The full OSM tag dicts are only kept (as an 'all_tags' column) when include_raw_tags is set.
+    """
     print("Querying Overpass API for wineries in Berlin...")
     
     try:
-        response = requests.post(overpass_url, data=overpass_query, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        wineries = []
+        data = orjson.loads(fetch_overpass_cached(OVERPASS_URL, BERLIN_WINERIES_QUERY, timeout=30))
         
-        for element in data.get('elements', []):
-            # Extract coordinates
-            if element['type'] == 'node':
-                lat = element.get('lat')
-                lon = element.get('lon')
-            elif 'center' in element:
-                lat = element['center'].get('lat')
-                lon = element['center'].get('lon')
-            else:
-                continue
-                
-            # Extract tags
-            tags = element.get('tags', {})
-            
-            # Create winery entry
-            winery = {
-                'id': element.get('id'),
-                'type': element.get('type'),
-                'name': tags.get('name', 'Unknown'),
-                'latitude': lat,
-                'longitude': lon,
-                'amenity': tags.get('amenity', ''),
-                'shop': tags.get('shop', ''),
-                'craft': tags.get('craft', ''),
-                'address': {
-                    'street': tags.get('addr:street', ''),
-                    'housenumber': tags.get('addr:housenumber', ''),
-                    'postcode': tags.get('addr:postcode', ''),
-                    'city': tags.get('addr:city', ''),
-                },
-                'contact': {
-                    'phone': tags.get('phone', ''),
-                    'website': tags.get('website', ''),
-                    'email': tags.get('email', ''),
-                },
-                'opening_hours': tags.get('opening_hours', ''),
-                'description': tags.get('description', ''),
-                'wine_types': tags.get('drink:wine', ''),
-                'all_tags': tags
-            }
-            
-            wineries.append(winery)
+        wineries = parse_elements(data, WINERY_SCHEMA, include_raw_tags)
         
-        print(f"Found {len(wineries)} wine-related establishments in Berlin")
+        print(f"Found {len(wineries['id'])} wine-related establishments in Berlin")
         return wineries
         
     except requests.RequestException as e:
         print(f"Error querying Overpass API: {e}")
-        return []
-    except json.JSONDecodeError as e:
+        return parse_elements({}, WINERY_SCHEMA)
+    except orjson.JSONDecodeError as e:
         print(f"Error parsing JSON response: {e}")
-        return []
+        return parse_elements({}, WINERY_SCHEMA)
 
-def save_to_json(wineries: List[Dict[str, Any]], filename: str = "../data/berlin_wineries.json") -> None:
-    """Save winery data to JSON file."""
+def save_to_json(wineries: Dict[str, List[Any]], filename: str = "../data/berlin_wineries.json") -> None:
+    """Save winery data to JSON file. Filenames ending in .gz are gzip-compressed."""
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(wineries, f, indent=2, ensure_ascii=False)
+        write_json(iter_records(wineries), filename)
         print(f"Data saved to {filename}")
     except Exception as e:
         print(f"Error saving to JSON: {e}")
 
-def save_to_csv(wineries: List[Dict[str, Any]], filename: str = "../data/berlin_wineries.csv") -> None:
+def save_to_csv(wineries: Dict[str, List[Any]], filename: str = "../data/berlin_wineries.csv") -> None:
     """Save winery data to CSV file."""
-    if not wineries:
+    if not wineries['id']:
         print("No data to save to CSV")
         return
         
     try:
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            fieldnames = [
-                'id', 'type', 'name', 'latitude', 'longitude', 
-                'amenity', 'shop', 'craft', 'street', 'housenumber', 
-                'postcode', 'city', 'phone', 'website', 'email', 
-                'opening_hours', 'description'
-            ]
-            
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for winery in wineries:
-                row = {
-                    'id': winery['id'],
-                    'type': winery['type'],
-                    'name': winery['name'],
-                    'latitude': winery['latitude'],
-                    'longitude': winery['longitude'],
-                    'amenity': winery['amenity'],
-                    'shop': winery['shop'],
-                    'craft': winery['craft'],
-                    'street': winery['address']['street'],
-                    'housenumber': winery['address']['housenumber'],
-                    'postcode': winery['address']['postcode'],
-                    'city': winery['address']['city'],
-                    'phone': winery['contact']['phone'],
-                    'website': winery['contact']['website'],
-                    'email': winery['contact']['email'],
-                    'opening_hours': winery['opening_hours'],
-                    'description': winery['description']
-                }
-                writer.writerow(row)
-                
+        fieldnames = [
+            'id', 'type', 'name', 'latitude', 'longitude', 
+            'amenity', 'shop', 'craft', 'street', 'housenumber', 
+            'postcode', 'city', 'phone', 'website', 'email', 
+            'opening_hours', 'description'
+        ]
+        
+        # The columns already hold the fields, so rows are just a zip over them
+        write_csv(zip(*(wineries[field] for field in fieldnames)), fieldnames, filename)
         print(f"Data saved to {filename}")
     except Exception as e:
         print(f"Error saving to CSV: {e}")
 
-def print_summary(wineries: List[Dict[str, Any]]) -> None:
+def print_summary(wineries: Dict[str, List[Any]]) -> None:
     """Print a summary of the downloaded data."""
-    if not wineries:
+    if not wineries['id']:
         print("No wineries found.")
         return
         
     print(f"\n=== SUMMARY ===")
-    print(f"Total establishments found: {len(wineries)}")
+    print(f"Total establishments found: {len(wineries['id'])}")
     
     # Count by type
-    types = {}
-    for winery in wineries:
-        if winery['amenity']:
-            key = f"amenity={winery['amenity']}"
-        elif winery['shop']:
-            key = f"shop={winery['shop']}"
-        elif winery['craft']:
-            key = f"craft={winery['craft']}"
-        else:
-            key = "other"
-        types[key] = types.get(key, 0) + 1
+    types = Counter(
+        f"amenity={amenity}" if amenity
+        else f"shop={shop}" if shop
+        else f"craft={craft}" if craft
+        else "other"
+        for amenity, shop, craft in zip(wineries['amenity'], wineries['shop'], wineries['craft'])
+    )
     
     print("\nBreakdown by type:")
     for type_name, count in sorted(types.items()):
@@ -189,25 +136,42 @@ def print_summary(wineries: List[Dict[str, Any]]) -> None:
     
     # Show some examples
     print(f"\nSample entries:")
-    for i, winery in enumerate(wineries[:3]):
-        print(f"  {i+1}. {winery['name']}")
-        if winery['address']['street']:
-            addr = f"{winery['address']['street']} {winery['address']['housenumber']}".strip()
+    for i in range(min(3, len(wineries['id']))):
+        print(f"  {i+1}. {wineries['name'][i]}")
+        if wineries['street'][i]:
+            addr = f"{wineries['street'][i]} {wineries['housenumber'][i]}".strip()
             print(f"     Address: {addr}")
-        print(f"     Coordinates: {winery['latitude']}, {winery['longitude']}")
-        if winery['contact']['website']:
-            print(f"     Website: {winery['contact']['website']}")
+        print(f"     Coordinates: {wineries['latitude'][i]}, {wineries['longitude'][i]}")
+        if wineries['website'][i]:
+            print(f"     Website: {wineries['website'][i]}")
         print()
 
 def main():
     """Main function to download and save winery data."""
+    parser = argparse.ArgumentParser(description="Download Berlin winery data from OpenStreetMap")
+    parser.add_argument("--raw", action="store_true",
+                        help="Only save the unparsed Overpass response, skipping CSV/JSON conversion")
+    args = parser.parse_args()
+    
     print("Berlin Wineries Downloader")
     print("=" * 30)
     
+    if args.raw:
+        # Overpass already returns valid JSON, so store its bytes without parsing them
+        try:
+            raw_bytes = fetch_overpass_cached(OVERPASS_URL, BERLIN_WINERIES_QUERY, timeout=30)
+        except requests.RequestException as e:
+            print(f"Error querying Overpass API: {e}")
+            return
+        with open(RAW_JSON_FILE, 'wb') as f:
+            f.write(raw_bytes)
+        print(f"Raw Overpass response saved to {RAW_JSON_FILE}")
+        return
+    
     # Download winery data
     wineries = get_berlin_wineries()
     
-    if not wineries:
+    if not wineries['id']:
         print("No winery data retrieved. Exiting.")
         return
     
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Pre-fetch OpenStreetMap tiles covering Berlin into a local on-disk tile cache.
+
+The interactive winery map loads tiles from outputs/tiles/{z}/{x}/{y}.png when
+that directory exists, so repeated map views no longer hit the public tile
+servers. Please respect the OSM tile usage policy: keep the worker count low
+and only re-run this script when the cache needs refreshing.
+"""
+
+import math
+import os
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Tuple
+
+TILE_URL = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+TILES_DIR = "../outputs/tiles"
+
+# Berlin boundaries (same as the interactive map)
+LAT_MIN, LAT_MAX = 52.3387, 52.6755
+LON_MIN, LON_MAX = 13.0883, 13.7611
+
+MIN_ZOOM, MAX_ZOOM = 10, 14
+
+def lat_lon_to_tile(lat: float, lon: float, zoom: int) -> Tuple[int, int]:
+    """Convert a coordinate to slippy-map tile indices at the given zoom level."""
+    n = 2 ** zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return x, y
+
+def berlin_tiles() -> Iterator[Tuple[int, int, int]]:
+    """Yield every (z, x, y) tile covering the Berlin bounding box."""
+    for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+        # Tile y grows southwards, so the northern edge gives the smallest index
+        x_min, y_min = lat_lon_to_tile(LAT_MAX, LON_MIN, zoom)
+        x_max, y_max = lat_lon_to_tile(LAT_MIN, LON_MAX, zoom)
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                yield zoom, x, y
+
+def download_tile(session: requests.Session, zoom: int, x: int, y: int) -> bool:
+    """Download a single tile unless it is already cached. Returns True on success."""
+    path = os.path.join(TILES_DIR, str(zoom), str(x), f"{y}.png")
+    if os.path.exists(path):
+        return True
+
+    try:
+        response = session.get(TILE_URL.format(z=zoom, x=x, y=y), timeout=30)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"Error downloading tile {zoom}/{x}/{y}: {e}")
+        return False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(response.content)
+    return True
+
+def main():
+    """Main function to populate the local tile cache."""
+    print("Berlin Map Tile Downloader")
+    print("=" * 30)
+
+    tiles = list(berlin_tiles())
+    print(f"Fetching {len(tiles)} tiles for zoom levels {MIN_ZOOM}-{MAX_ZOOM}...")
+
+    with requests.Session() as session:
+        # The OSM tile servers require an identifying User-Agent
+        session.headers['User-Agent'] = 'berlin-winery-analysis tile cache'
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(lambda tile: download_tile(session, *tile), tiles))
+
+    print(f"{sum(results)}/{len(tiles)} tiles available in {TILES_DIR}")
+    print("Re-run create_real_map_visualization.py to use the local tiles.")
+
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,36 @@ Download Berlin wineries with temporal data to identify recently opened establis
 """
 
 import requests
-import json
+import orjson
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import time
+from collections import Counter
+
+from overpass_utils import OVERPASS_URL, fetch_overpass_cached, iter_located_elements, write_json
+
+# Winery fields taken from OSM tags after the coordinates, as (column, tag, default)
+RECENT_WINERY_TAG_FIELDS = (
+    ('amenity', 'amenity', ''),
+    ('shop', 'shop', ''),
+    ('craft', 'craft', ''),
+    ('street', 'addr:street', ''),
+    ('housenumber', 'addr:housenumber', ''),
+    ('postcode', 'addr:postcode', ''),
+    ('city', 'addr:city', ''),
+    ('phone', 'phone', ''),
+    ('website', 'website', ''),
+    ('email', 'email', ''),
+    ('opening_hours', 'opening_hours', ''),
+    ('description', 'description', ''),
+    ('start_date', 'start_date', ''),  # Explicit opening date if available
+    ('opening_date', 'opening_date', ''),  # Alternative opening date field
+)
 
 def get_berlin_wineries_with_dates():
     """Download winery data from OpenStreetMap with temporal information."""
     
-    overpass_url = "http://overpass-api.de/api/interpreter"
-    
     # Enhanced Overpass query to get temporal metadata
     overpass_query = """
     [out:json][timeout:30];
@@ -42,26 +61,11 @@ def get_berlin_wineries_with_dates():
     print("Querying Overpass API for wineries in Berlin with temporal data...")
     
     try:
-        response = requests.post(overpass_url, data=overpass_query, timeout=60)
-        response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(fetch_overpass_cached(OVERPASS_URL, overpass_query, timeout=60))
         
         wineries = []
         
-        for element in data.get('elements', []):
-            # Extract coordinates
-            if element['type'] == 'node':
-                lat = element.get('lat')
-                lon = element.get('lon')
-            elif 'center' in element:
-                lat = element['center'].get('lat')
-                lon = element['center'].get('lon')
-            else:
-                continue
-                
-            # Extract tags
-            tags = element.get('tags', {})
-            
+        for element, lat, lon, tags in iter_located_elements(data):
             # Extract temporal metadata
             timestamp = element.get('timestamp', '')
             version = element.get('version', 1)
@@ -82,20 +86,7 @@ def get_berlin_wineries_with_dates():
                 'name': tags.get('name', 'Unknown'),
                 'latitude': lat,
                 'longitude': lon,
-                'amenity': tags.get('amenity', ''),
-                'shop': tags.get('shop', ''),
-                'craft': tags.get('craft', ''),
-                'street': tags.get('addr:street', ''),
-                'housenumber': tags.get('addr:housenumber', ''),
-                'postcode': tags.get('addr:postcode', ''),
-                'city': tags.get('addr:city', ''),
-                'phone': tags.get('phone', ''),
-                'website': tags.get('website', ''),
-                'email': tags.get('email', ''),
-                'opening_hours': tags.get('opening_hours', ''),
-                'description': tags.get('description', ''),
-                'start_date': tags.get('start_date', ''),  # Explicit opening date if available
-                'opening_date': tags.get('opening_date', ''),  # Alternative opening date field
+                **{column: tags.get(tag, default) for column, tag, default in RECENT_WINERY_TAG_FIELDS},
                 'osm_timestamp': timestamp,  # When the OSM object was created/modified
                 'osm_version': version,  # Version number (higher = more recent edits)
                 'osm_changeset': changeset,
@@ -111,7 +102,7 @@ def get_berlin_wineries_with_dates():
     except requests.exceptions.RequestException as e:
         print(f"Error downloading data: {e}")
         return []
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         print(f"Error parsing JSON response: {e}")
         return []
 
@@ -223,8 +214,7 @@ def save_recent_wineries_data(wineries: List[Dict[str, Any]]) -> None:
     # Save to JSON
     json_filename = "../data/berlin_wineries_recent.json"
     try:
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump(wineries, f, indent=2, ensure_ascii=False)
+        write_json(wineries, json_filename)
         print(f"Data saved to {json_filename}")
     except Exception as e:
         print(f"Error saving to JSON: {e}")
@@ -244,25 +234,17 @@ def analyze_recent_trends(wineries: List[Dict[str, Any]]) -> None:
     print("\n=== TEMPORAL ANALYSIS ===")
     
     # Count by recency category
-    recency_counts = {}
-    district_recent_counts = {}
-    
-    for winery in wineries:
-        category = winery.get('recency_category', 'unknown')
-        district = winery.get('district', 'Unknown')
-        
-        recency_counts[category] = recency_counts.get(category, 0) + 1
-        
-        if winery.get('is_recent', False):
-            district_recent_counts[district] = district_recent_counts.get(district, 0) + 1
+    recency_counts = Counter(winery.get('recency_category', 'unknown') for winery in wineries)
+    district_recent_counts = Counter(
+        winery.get('district', 'Unknown') for winery in wineries if winery.get('is_recent', False)
+    )
     
     print("\nRecency Distribution:")
     for category, count in sorted(recency_counts.items()):
         print(f"  {category}: {count}")
     
     print(f"\nRecent Wineries by District (last 2 years):")
-    sorted_districts = sorted(district_recent_counts.items(), key=lambda x: x[1], reverse=True)
-    for district, count in sorted_districts:
+    for district, count in district_recent_counts.most_common():
         print(f"  {district}: {count} recent wineries")
     
     # Show some examples of recent wineries
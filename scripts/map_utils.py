@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for building the interactive Folium maps of Berlin
+"""
+
+import folium
+
+# Berlin center coordinates
+BERLIN_CENTER = [52.520008, 13.404954]
+
+def create_berlin_base_map(title, subtitle, tiles='cartodbpositron', prefer_canvas=False):
+    """
+    Create a Folium map centered on Berlin with a centered title and subtitle.
+    With prefer_canvas, Leaflet draws vector layers into one canvas instead of SVG elements.
+    """
+
+    # Create base map
+    m = folium.Map(
+        location=BERLIN_CENTER,
+        zoom_start=11,
+        tiles=tiles,
+        prefer_canvas=prefer_canvas
+    )
+
+    # Add title
+    title_html = f'''
+    <h3 align="center" style="font-size:20px"><b>{title}</b></h3>
+    <p align="center" style="font-size:14px">{subtitle}</p>
+    '''
+    m.get_root().html.add_child(folium.Element(title_html))
+
+    return m
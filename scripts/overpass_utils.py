@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for querying the Overpass API and saving the results
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import time
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+import orjson
+import requests
+
+# Overpass API endpoint
+OVERPASS_URL = "http://overpass-api.de/api/interpreter"
+
+OVERPASS_CACHE_DIR = "../data/.overpass_cache"
+
+# Shared HTTP session so repeated Overpass queries reuse the same keep-alive
+# connection; Overpass JSON compresses well, so always ask for gzip
+_SESSION = requests.Session()
+_SESSION.headers.update({'Accept-Encoding': 'gzip, deflate'})
+
+# Characters that force a CSV field to be quoted (same rule as csv.QUOTE_MINIMAL)
+_CSV_NEEDS_QUOTING = re.compile(r'[",\r\n]')
+
+def overpass_runtime_error(content: bytes) -> Optional[str]:
+    """
+    Return the error reported inside an Overpass response body, or None if there is none.
+    Overpass reports query timeouts and memory aborts as HTTP 200 responses whose
+    'remark' starts with "runtime error" and whose elements are truncated or empty.
+    """
+    try:
+        data = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return "response is not valid JSON"
+    remark = data.get('remark', '') if isinstance(data, dict) else ''
+    return remark if 'runtime error' in remark else None
+
+def fetch_overpass_cached(overpass_url: str, query: str, timeout: int, ttl: int = 86400) -> bytes:
+    """
+    Return the raw Overpass API response for a query.
+    Responses are cached on disk keyed by the query hash and reused for ttl seconds.
+    Once an entry has expired it is revalidated with its ETag/Last-Modified, so an
+    unchanged result is served from the cache instead of being downloaded again.
+    """
+    cache_key = hashlib.sha1(f"{overpass_url}\n{query}".encode('utf-8')).hexdigest()
+    cache_path = os.path.join(OVERPASS_CACHE_DIR, cache_key)
+    meta_path = f"{cache_path}.meta"
+
+    headers = {}
+    if os.path.exists(cache_path):
+        if time.time() - os.path.getmtime(cache_path) < ttl:
+            print(f"Using cached Overpass response {cache_key[:12]}")
+            with open(cache_path, 'rb') as f:
+                return f.read()
+
+        # Ask the server to only send the body if it changed since we cached it
+        try:
+            with open(meta_path, 'rb') as f:
+                validators = orjson.loads(f.read())
+            if validators.get('ETag'):
+                headers['If-None-Match'] = validators['ETag']
+            if validators.get('Last-Modified'):
+                headers['If-Modified-Since'] = validators['Last-Modified']
+        except (OSError, orjson.JSONDecodeError):
+            pass
+
+    response = _SESSION.post(overpass_url, data=query, timeout=timeout, headers=headers)
+
+    if response.status_code == 304 and headers:
+        print(f"Overpass data unchanged, reusing cached response {cache_key[:12]}")
+        # Restart the ttl so the next run doesn't revalidate again straight away
+        os.utime(cache_path)
+        with open(cache_path, 'rb') as f:
+            return f.read()
+
+    response.raise_for_status()
+
+    # Never cache a failed query, or it would be served for the whole ttl
+    error = overpass_runtime_error(response.content)
+    if error:
+        print(f"Overpass query did not complete, not caching the response: {error}")
+        return response.content
+
+    # Write atomically so an interrupted run never leaves a truncated cache entry
+    try:
+        os.makedirs(OVERPASS_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(response.content)
+        os.replace(tmp_path, cache_path)
+
+        validators = {name: response.headers[name] for name in ('ETag', 'Last-Modified')
+                      if name in response.headers}
+        with open(meta_path, 'wb') as f:
+            f.write(orjson.dumps(validators))
+    except OSError as e:
+        print(f"Could not cache Overpass response: {e}")
+
+    return response.content
+
+def iter_located_elements(data: Dict[str, Any]) -> Iterator[Tuple[Dict[str, Any], Optional[float], Optional[float], Dict[str, str]]]:
+    """
+    Yield (element, lat, lon, tags) for every element in an Overpass response.
+    Ways and relations are located by their center; elements without one are skipped.
+    """
+    for element in data.get('elements', []):
+        # Extract coordinates
+        if element['type'] == 'node':
+            lat = element.get('lat')
+            lon = element.get('lon')
+        elif 'center' in element:
+            lat = element['center'].get('lat')
+            lon = element['center'].get('lon')
+        else:
+            continue
+
+        yield element, lat, lon, element.get('tags', {})
+
+def parse_elements(data: Dict[str, Any], schema: Iterable[Tuple[str, str, Any]],
+                   include_raw_tags: bool = False) -> Dict[str, List[Any]]:
+    """
+    Flatten an Overpass response into parallel column lists.
+    Every element gets id, type, latitude and longitude, plus one column per
+    (column, tag, default) entry in schema. The full tag dicts are kept as an
+    'all_tags' column only when include_raw_tags is set.
+    """
+    schema = tuple(schema)
+    columns = {'id': [], 'type': [], 'latitude': [], 'longitude': []}
+    columns.update((column, []) for column, _, _ in schema)
+    if include_raw_tags:
+        columns['all_tags'] = []
+
+    for element, lat, lon, tags in iter_located_elements(data):
+        columns['id'].append(element.get('id'))
+        columns['type'].append(element.get('type'))
+        columns['latitude'].append(lat)
+        columns['longitude'].append(lon)
+        for column, tag, default in schema:
+            columns[column].append(tags.get(tag, default))
+        if include_raw_tags:
+            columns['all_tags'].append(tags)
+
+    return columns
+
+def iter_records(columns: Dict[str, List[Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield one flat record per row of the column lists, keyed by column name."""
+    names = list(columns)
+    for row in zip(*columns.values()):
+        yield dict(zip(names, row))
+
+def _csv_escape(value: Any) -> str:
+    """Format a single value as a CSV field, quoting it only when needed."""
+    if value is None:
+        return ''
+    text = str(value)
+    if _CSV_NEEDS_QUOTING.search(text):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+def write_csv(rows: Iterable[Iterable[Any]], fieldnames: List[str], filename: str) -> None:
+    """
+    Write rows (in fieldname order) to a CSV file.
+    The whole file is formatted as one string and written in a single call,
+    using the same CRLF line endings and minimal quoting as csv.writer.
+    """
+    lines = [','.join(fieldnames)]
+    lines.extend(','.join(map(_csv_escape, row)) for row in rows)
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        f.write('\r\n'.join(lines) + '\r\n')
+
+def write_json_stream(records: Iterable[Dict[str, Any]], f) -> None:
+    """
+    Write records to a binary file as a JSON array, one record per line.
+    Records are serialized one at a time so the full document is never held in memory.
+    NumPy scalar values are written as their plain JSON equivalents.
+    """
+    f.write(b'[')
+    for i, record in enumerate(records):
+        f.write(b',\n' if i else b'\n')
+        f.write(orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY))
+    f.write(b'\n]')
+
+def write_json(records: Iterable[Dict[str, Any]], filename: str) -> None:
+    """Write records to a JSON file. Filenames ending in .gz are gzip-compressed."""
+    # Level 1 already gets most of the size reduction on the repetitive JSON
+    if filename.endswith('.gz'):
+        f = gzip.open(filename, 'wb', compresslevel=1)
+    else:
+        f = open(filename, 'wb')
+    with f:
+        write_json_stream(records, f)